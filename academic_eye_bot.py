@@ -16,14 +16,10 @@ from telegram import Update
 from telegram.ext import ApplicationBuilder, ContextTypes, MessageHandler, filters
 
 # Proje modülleri
-from modules.feed_engine.scraper import get_latest_papers
-from modules.feed_engine.processor import summarize_paper, get_model
-from modules.feed_engine.pdf_engine import download_and_extract_text
-from modules.feed_engine.vector_engine import search_relevant_users
-from database import log_sent_paper, get_all_users, get_user_mendeley_token, get_user_history
-from modules.feed_engine.notifier import send_notification, send_audio
-from modules.feed_engine.audio import text_to_speech
-from modules.feed_engine.mendeley_engine import add_paper_to_library
+from modules.feed_engine.scan_runner import run_scan, deliver_telegram, add_workers_argument, parse_stage_workers
+from modules.feed_engine.processor import get_model, ask_model_async
+from modules.feed_engine.prompt_budget import qa_context
+from database import get_all_users
 import paper_cache
 
 load_dotenv()
@@ -50,102 +46,21 @@ def log_message(message):
 
 
 # ===================== MAKALE TARAYICI =====================
-def is_paper_sent_to_user(user_id, url):
-    history = get_user_history(user_id)
-    for paper in history:
-        if paper['url'] == url:
-            return True
-    return False
-
-
-def process_for_user(user):
+def deliver(job):
+    """Telegram teslim aşaması (en az 1 makale gönderildiyse bot 30 dk açık kalır)."""
     global PAPER_SENT_FLAG
-    user_id = user['id']
-    hoca_adi = user['name']
-    chat_id = user['chat_id']
-    kategori_kodlari = user['interests']
-    anahtar_kelimeler = user['keywords']
-    style = user['style'] if 'style' in user.keys() and user['style'] else 'samimi'
-    detail = user['detail_level'] if 'detail_level' in user.keys() and user['detail_level'] else 'orta'
-
-    log_message(f"🔍 KULLANICI: {hoca_adi} (Mod: {style}/{detail})")
-
-    try:
-        makaleler = get_latest_papers(interests_code=kategori_kodlari, keywords_text=anahtar_kelimeler, limit=50)
-    except Exception as e:
-        log_message(f"❌ Tarama Hatası: {e}")
-        return
+    if deliver_telegram(job, log=log_message):
+        # FLAG'i True yap (En az 1 makale gönderildi)
+        PAPER_SENT_FLAG = True
 
-    if not makaleler:
-        log_message("   ❌ Makale bulunamadı.")
-        return
 
-    bulunan_makale = None
-
-    for i, makale in enumerate(makaleler):
-        if is_paper_sent_to_user(user_id, makale['url']):
-            continue
-
-        try:
-            uygun_hocalar = search_relevant_users(makale['abstract'], threshold=1.6)
-        except:
-            continue
-
-        if user_id in uygun_hocalar:
-            log_message(f"   🎯 EŞLEŞME: {makale['title'][:40]}...")
-            log_message("   📄 PDF Analiz Ediliyor...")
-            tam_metin = download_and_extract_text(makale['url'])
-            ozet = summarize_paper(makale, full_text=tam_metin, style=style, detail_level=detail)
-
-            log_message(f"   📲 Gönderiliyor...")
-            mesaj = f"👋 Sayın {hoca_adi},\n\n🚨 **Özel Seçki**\n\n{ozet}\n\n🔗 [Link]({makale['url']})"
-
-            msg_id = None
-            if chat_id:
-                # Önce sesi oluştur (böylece mesajla aynı anda gider)
-                ses = text_to_speech(ozet, style=style)
-                
-                # Sesi oluşturduktan sonra mesajı at
-                msg_id = send_notification(mesaj, target_chat_id=chat_id)
-                
-                if ses:
-                    send_audio(ses, target_chat_id=chat_id)
-
-                # 30 dakikalık soru penceresi
-                paper_cache.add_paper(chat_id, makale['title'], tam_metin if tam_metin else ozet)
-                bilgi_mesaji = "📣 **30 dakika içinde** bu makaleyle ilgili sorularınızı yanıtlayabilirim! Sadece bu mesaja **Yanıtla** diyerek sorunuzu yazın."
-                send_notification(bilgi_mesaji, target_chat_id=chat_id)
-                
-                # FLAG'i True yap (En az 1 makale gönderildi)
-                PAPER_SENT_FLAG = True
-
-            token = get_user_mendeley_token(user_id)
-            if token:
-                log_message("   📚 Mendeley'e ekleniyor...")
-                basari = add_paper_to_library(token, makale['title'], makale['url'], makale['abstract'], user_id=user_id)
-                if basari:
-                    log_message("   ✅ Mendeley tamam.")
-                else:
-                    log_message("   ❌ Mendeley hatası.")
-
-            log_sent_paper(user_id, makale['title'], makale['url'], ozet, full_text=tam_metin, telegram_message_id=msg_id)
-            log_message("   ✅ Web paneline arşivlendi.")
-            bulunan_makale = makale
-            break
-
-    if not bulunan_makale:
-        log_message(f"   🏁 Uygun makale yok.")
-
-
-def run_paper_scan():
-    """Makale taramasını bir kez çalıştırır."""
+def run_paper_scan(workers=1, stage_workers=None, batch_summaries=False):
+    """Makale taramasını bir kez çalıştırır. Aşamalar (PDF, özet, ses, teslim) paralel ilerler."""
     log_message("🚀 MAKALE TARAMASI BAŞLADI")
     users = get_all_users()
     if users:
-        for user in users:
-            process_for_user(user)
-            print("-" * 40)
-            time.sleep(2)
+        run_scan(users, deliver, log=log_message, workers=workers, stage_workers=stage_workers,
+                 batch_summaries=batch_summaries)
     log_message("🏁 Tarama Tamamlandı.\n")
 
 
@@ -189,7 +104,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     GÖREV: Sen bir akademik asistansın. Aşağıdaki makale hakkında kullanıcının sorusunu cevapla.
     
     MAKALE: {paper_title}
-    İÇERİK: {content[:50000]}
+    İÇERİK: {qa_context(content, text)}
     
     KULLANICI SORUSU: {text}
     
@@ -200,11 +115,10 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     4. Cevap kısa ve öz olsun (maksimum 4000 karakter).
     """
 
-    try:
-        response = model.generate_content(prompt)
-        reply_text = response.text
-    except Exception as e:
-        reply_text = f"⚠️ Bir hata oluştu: {str(e)}"
+    # Öncelikli şerit: tarama özetlerinin arkasında beklemez, süre dolarsa iptal edilir
+    reply_text = await ask_model_async(prompt, "interactive")
+    if not reply_text:
+        reply_text = "⚠️ Şu an cevap üretemedim, lütfen biraz sonra tekrar deneyin."
 
     try:
         await context.bot.send_message(chat_id=chat_id, text=reply_text, parse_mode='Markdown')
@@ -213,11 +127,11 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 # ===================== BACKGROUND YÖNETİCİSİ =====================
-def background_scanner_loop():
+def background_scanner_loop(workers=1, stage_workers=None, batch_summaries=False):
     """Arka planda çalışacak tarama ve lifecycle mantığı"""
     # 1. Taramayı Başlat
     try:
-        run_paper_scan()
+        run_paper_scan(workers=workers, stage_workers=stage_workers, batch_summaries=batch_summaries)
     except Exception as e:
         log_message(f"❌ Tarama sırasında kritik hata: {e}")
     
@@ -234,7 +148,7 @@ def background_scanner_loop():
 
 
 # ===================== ANA BAŞLATICI =====================
-def main():
+def main(workers=1, stage_workers=None, batch_summaries=False):
     token = os.getenv("TELEGRAM_BOT_TOKEN")
     if not token:
         print("❌ TELEGRAM_BOT_TOKEN bulunamadı!")
@@ -248,7 +162,8 @@ def main():
     async def post_init(application):
         # Bot hazır olduğunda tarama thread'ini başlat
         # Daemon=True: Ana process kapanınca bu da ölür
-        threading.Thread(target=background_scanner_loop, daemon=True).start()
+        threading.Thread(target=background_scanner_loop, kwargs={"workers": workers, "stage_workers": stage_workers,
+                                 "batch_summaries": batch_summaries}, daemon=True).start()
 
     application = ApplicationBuilder().token(token).post_init(post_init).build()
     handler = MessageHandler(filters.TEXT & (~filters.COMMAND), handle_message)
@@ -261,4 +176,6 @@ def main():
     application.run_polling()
 
 if __name__ == '__main__':
-    main()
+    args = add_workers_argument().parse_args()
+    main(workers=args.workers, stage_workers=parse_stage_workers(args.stage_workers),
+         batch_summaries=args.batch_summaries)
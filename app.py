@@ -547,7 +547,9 @@ def whatsapp_webhook():
             
             # Tam özeti gönder
             from modules.feed_engine.whatsapp_notifier import send_whatsapp_message, send_whatsapp_audio
-            from modules.feed_engine.audio import text_to_speech
+            from concurrent.futures import TimeoutError as FutureTimeoutError
+            from modules.feed_engine.audio import submit_speech
+            from modules.feed_engine.extractive import is_extractive
             
             # Telegram gibi tam mesaj
             full_message = f"""👋 Sayın {user['name']},
@@ -563,9 +565,19 @@ def whatsapp_webhook():
             msg_id = send_whatsapp_message(phone, full_message)
             
             if msg_id:
-                # Ses dosyası oluştur ve gönder
-                print(f"🎙️ Ses oluşturuluyor...")
-                audio_file = text_to_speech(pending['paper_summary'], style=user.get('style', 'samimi'))
+                # Ses dosyası oluştur ve gönder (İngilizce alıntılı yerel özetler seslendirilmez)
+                audio_file = None
+                if not is_extractive(pending['paper_summary']):
+                    print(f"🎙️ Ses oluşturuluyor...")
+                    # WhatsApp sesli notu: ogg/opus (MP3'ten çok daha küçük, daha hızlı yüklenir)
+                    # "web" önceliği: Gemini ses kotası kısa sürede açılmazsa EdgeTTS kullanılır
+                    speech = submit_speech(pending['paper_summary'], style=user.get('style', 'samimi'),
+                                           fmt="ogg", priority="web")
+                    try:
+                        audio_file = speech.result(timeout=float(os.getenv('WHATSAPP_TTS_TIMEOUT', '90')))
+                    except FutureTimeoutError:
+                        # Üretim arka planda sürer ve önbelleğe yazılır; mesaj sessiz gönderilir
+                        print("⏳ Ses zamanında hazırlanamadı, sadece metin gönderildi.")
                 
                 if audio_file:
                     print(f"📤 Ses gönderiliyor...")
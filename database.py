@@ -1,11 +1,78 @@
 # FILE: database.py (TAM HALİ)
+import os
+import time
 import sqlite3
 import json
+import threading
+
+from modules.feed_engine.paper_id import canonical_paper_id
 
 DB_NAME = "academic_memory.db"
 
+# Paralel taramada (--workers) "database is locked" hatası yerine beklesin
+DB_TIMEOUT = 30
+# Aynı süreçteki thread'lerin yazma işlemlerini sıraya sokar
+_write_lock = threading.Lock()
+
+# user_history'de aynı (kullanıcı, makale) için birden fazla kayıt varsa silinsin mi?
+# Varsayılan kapalı: kayıtlar korunur, sadece uyarı basılır. Açıkken önce yedek alınır.
+DEDUP_HISTORY = os.getenv("DEDUP_USER_HISTORY", "0") == "1"
+
+
+def _backup_db(conn):
+    """Veritabanının tam kopyasını (academic_memory.db.bak-<zaman>) alır. Dönen: yedek yolu"""
+    backup_path = f"{DB_NAME}.bak-{time.strftime('%Y%m%d-%H%M%S')}"
+    backup = sqlite3.connect(backup_path)
+    try:
+        conn.backup(backup)
+    finally:
+        backup.close()
+    return backup_path
+
+
+def _migrate_history_paper_ids(conn):
+    """
+    user_history'ye kanonik paper_id kolonunu ekler ve doldurur; (user_id, paper_id) indeksini kurar.
+    abs / pdf / sürümlü URL'ler aynı makale sayılır.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("ALTER TABLE user_history ADD COLUMN paper_id TEXT")
+    except sqlite3.OperationalError:
+        pass
+
+    rows = cursor.execute("SELECT id, url FROM user_history WHERE paper_id IS NULL").fetchall()
+    if rows:
+        cursor.executemany("UPDATE user_history SET paper_id = ? WHERE id = ?",
+                           [(canonical_paper_id(url), row_id) for row_id, url in rows])
+
+    # Ham URL üzerindeki eski indeks yerini kanonik kimliğe bırakır
+    cursor.execute("DROP INDEX IF EXISTS idx_user_history_user_url")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_history_paper ON user_history(paper_id)")
+
+    duplicates = cursor.execute("""
+        SELECT COUNT(*) FROM user_history
+        WHERE id NOT IN (SELECT MIN(id) FROM user_history GROUP BY user_id, paper_id)
+    """).fetchone()[0]
+    if duplicates and DEDUP_HISTORY:
+        conn.commit()
+        backup_path = _backup_db(conn)
+        print(f"🧹 user_history: {duplicates} tekrar eden kayıt siliniyor (yedek: {backup_path})")
+        cursor.execute("""
+            DELETE FROM user_history
+            WHERE id NOT IN (SELECT MIN(id) FROM user_history GROUP BY user_id, paper_id)
+        """)
+    elif duplicates:
+        print(f"⚠️ user_history: aynı makale için {duplicates} tekrar eden kayıt var; kayıtlar korunuyor. "
+              f"Temizlemek için DEDUP_USER_HISTORY=1 (önce yedek alınır).")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_history_user_paper_nu ON user_history(user_id, paper_id)")
+        return
+
+    cursor.execute("DROP INDEX IF EXISTS idx_user_history_user_paper_nu")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_user_history_user_paper ON user_history(user_id, paper_id)")
+
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     conn.execute("PRAGMA journal_mode=WAL;")
     cursor = conn.cursor()
 
@@ -52,6 +119,9 @@ def init_db():
     except sqlite3.OperationalError:
         pass
 
+    # "Daha önce gönderildi mi?" kontrolü için kanonik (user_id, paper_id) indeksi
+    _migrate_history_paper_ids(conn)
+
     # 3. AKADEMİK KİMLİK KARTI (GÜNCELLENDİ)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS user_profiles (
@@ -131,7 +201,7 @@ def init_db():
 
 # --- KULLANICI İŞLEMLERİ ---
 def add_user(name, chat_id, email, password, university, interests, keywords):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -146,7 +216,7 @@ def add_user(name, chat_id, email, password, university, interests, keywords):
         conn.close()
 
 def check_user_login(email, password):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users WHERE email = ? AND password = ?", (email, password))
@@ -155,7 +225,7 @@ def check_user_login(email, password):
     return user
 
 def update_user_preferences(user_id, style, detail_level, keywords, interests):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("""
         UPDATE users 
@@ -167,7 +237,7 @@ def update_user_preferences(user_id, style, detail_level, keywords, interests):
     print(f"✅ Kullanıcı {user_id} tercihleri güncellendi.")
 
 def get_user_by_id(user_id):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
@@ -176,15 +246,16 @@ def get_user_by_id(user_id):
     return user
 
 def update_user_mendeley_token(user_id, token_dict):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     token_str = json.dumps(token_dict)
-    cursor.execute("UPDATE users SET mendeley_token = ? WHERE id = ?", (token_str, user_id))
-    conn.commit()
-    conn.close()
+    with _write_lock:
+        conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET mendeley_token = ? WHERE id = ?", (token_str, user_id))
+        conn.commit()
+        conn.close()
 
 def get_user_mendeley_token(user_id):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("SELECT mendeley_token FROM users WHERE id = ?", (user_id,))
     result = cursor.fetchone()
@@ -194,7 +265,7 @@ def get_user_mendeley_token(user_id):
     return None
 
 def get_all_users():
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users")
@@ -203,7 +274,7 @@ def get_all_users():
     return users
 
 def get_user_id_by_chat_id(chat_id):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("SELECT id FROM users WHERE chat_id = ?", (str(chat_id),))
     result = cursor.fetchone()
@@ -212,20 +283,59 @@ def get_user_id_by_chat_id(chat_id):
 
 # --- GEÇMİŞ / ARŞİV İŞLEMLERİ ---
 def log_sent_paper(user_id, title, url, summary, full_text=None, telegram_message_id=None):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM user_history WHERE user_id = ? AND url = ?", (user_id, url))
-    if cursor.fetchone():
+    with _write_lock:
+        conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
+        cursor = conn.cursor()
+        # Aynı makale (abs / pdf / sürümlü URL fark etmez) kullanıcıya ikinci kez kaydedilmez
+        paper_id = canonical_paper_id(url)
+        cursor.execute("""
+            INSERT OR IGNORE INTO user_history (user_id, title, url, paper_id, summary, full_text, telegram_message_id)
+            SELECT ?, ?, ?, ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM user_history WHERE user_id = ? AND paper_id = ?)
+        """, (user_id, title, url, paper_id, summary, full_text, telegram_message_id, user_id, paper_id))
+        conn.commit()
         conn.close()
-        return
 
-    cursor.execute("INSERT INTO user_history (user_id, title, url, summary, full_text, telegram_message_id) VALUES (?, ?, ?, ?, ?, ?)",
-                   (user_id, title, url, summary, full_text, telegram_message_id))
-    conn.commit()
+def load_sent_paper_index(user_ids=None):
+    """
+    Gönderilmiş makaleleri tek sorguyla (sadece user_id, paper_id) yükler.
+    Dönen: {(user_id, kanonik_makale_id), ...}  -> O(1) üyelik kontrolü
+    """
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
+    cursor = conn.cursor()
+    if user_ids:
+        placeholders = ",".join("?" * len(user_ids))
+        cursor.execute(f"SELECT user_id, paper_id, url FROM user_history WHERE user_id IN ({placeholders})",
+                       list(user_ids))
+    else:
+        cursor.execute("SELECT user_id, paper_id, url FROM user_history")
+    rows = cursor.fetchall()
+    conn.close()
+    return {(user_id, paper_id or canonical_paper_id(url)) for user_id, paper_id, url in rows}
+
+def is_paper_sent_to_user(user_id, url, sent_index=None):
+    """
+    Kullanıcıya bu makale daha önce gönderilmiş mi?
+    sent_index (load_sent_paper_index) verilirse DB'ye hiç gidilmez.
+    """
+    if sent_index is not None:
+        return (user_id, canonical_paper_id(url)) in sent_index
+
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM user_history WHERE user_id = ? AND paper_id = ? LIMIT 1",
+                   (user_id, canonical_paper_id(url)))
+    result = cursor.fetchone()
     conn.close()
+    return result is not None
+
+def mark_paper_sent(sent_index, user_id, url):
+    """Aynı tarama içinde makalenin tekrar seçilmemesi için indekse ekler."""
+    if sent_index is not None:
+        sent_index.add((user_id, canonical_paper_id(url)))
 
 def get_user_history(user_id):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM user_history WHERE user_id = ? ORDER BY date_sent DESC", (user_id,))
@@ -234,9 +344,9 @@ def get_user_history(user_id):
     return papers
 
 def is_paper_processed_globally(url):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
-    cursor.execute("SELECT id FROM user_history WHERE url = ?", (url,))
+    cursor.execute("SELECT id FROM user_history WHERE paper_id = ? LIMIT 1", (canonical_paper_id(url),))
     result = cursor.fetchone()
     conn.close()
     return result is not None
@@ -246,7 +356,7 @@ def get_paper_context(user_id, message_id=None):
     Belirli bir mesajın yanıtı mı diye bakar, yoksa son makaleyi getirir.
     Dönen: (title, summary, full_text) veya None
     """
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
@@ -273,7 +383,7 @@ def get_paper_context(user_id, message_id=None):
 # --- KARİYER MOTORU İŞLEMLERİ (GÜNCELLENDİ) ---
 
 def get_user_profile_stats(user_id):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM user_profiles WHERE user_id = ?", (user_id,))
@@ -301,7 +411,7 @@ def save_career_analysis(user_id, report_data):
     """
     Kariyer analiz raporunu (sözlük) JSON olarak kaydeder.
     """
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     report_json = json.dumps(report_data, ensure_ascii=False)
     
@@ -316,7 +426,7 @@ def save_career_analysis(user_id, report_data):
     conn.close()
 
 def update_scholar_stats(user_id, scholar_id, citations, h_index, paper_count=0):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     # UPSERT: Varsa güncelle, yoksa ekle
     cursor.execute("""
@@ -332,7 +442,7 @@ def update_scholar_stats(user_id, scholar_id, citations, h_index, paper_count=0)
     conn.close()
 
 def update_yok_id(user_id, yok_id):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("""
         INSERT INTO user_profiles (user_id, yok_id) 
@@ -343,7 +453,7 @@ def update_yok_id(user_id, yok_id):
     conn.close()
 
 def update_yok_stats(user_id, yok_id, paper_count):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("""
         UPDATE user_profiles 
@@ -354,7 +464,7 @@ def update_yok_stats(user_id, yok_id, paper_count):
     conn.close()
 
 def add_project(user_id, title, source, role, year, status):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     try:
         cursor.execute("INSERT INTO user_projects (user_id, title, source, role, year, status) VALUES (?, ?, ?, ?, ?, ?)",
@@ -366,7 +476,7 @@ def add_project(user_id, title, source, role, year, status):
         conn.close()
 
 def update_ieee_id(user_id, ieee_id):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("INSERT OR IGNORE INTO user_profiles (user_id) VALUES (?)", (user_id,))
     cursor.execute("UPDATE user_profiles SET ieee_id = ? WHERE user_id = ?", (ieee_id, user_id))
@@ -374,7 +484,7 @@ def update_ieee_id(user_id, ieee_id):
     conn.close()
 
 def update_scopus_id(user_id, scopus_id):
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("INSERT OR IGNORE INTO user_profiles (user_id) VALUES (?)", (user_id,))
     cursor.execute("UPDATE user_profiles SET scopus_id = ? WHERE user_id = ?", (scopus_id, user_id))
@@ -386,7 +496,7 @@ def create_admin_user(name, email, password):
     """
     Admin kullanıcı oluşturur.
     """
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -406,7 +516,7 @@ def is_user_admin(user_id):
     """
     Kullanıcının admin olup olmadığını kontrol eder.
     """
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("SELECT is_admin FROM users WHERE id = ?", (user_id,))
     result = cursor.fetchone()
@@ -417,7 +527,7 @@ def set_user_admin_status(user_id, is_admin):
     """
     Kullanıcının adminlik durumunu günceller.
     """
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("UPDATE users SET is_admin = ? WHERE id = ?", (is_admin, user_id))
     conn.commit()
@@ -427,7 +537,7 @@ def get_all_admin_users():
     """
     Tüm admin kullanıcıları listeler.
     """
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     cursor.execute("SELECT id, name, email FROM users WHERE is_admin = 1")
@@ -439,21 +549,22 @@ def get_all_admin_users():
 # --- WHATSAPP İŞLEMLERİ ---
 def add_pending_paper(user_id, paper_title, paper_url, paper_summary, full_text, paper_keywords):
     """WhatsApp webhook için pending makale ekler"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO pending_papers 
-        (user_id, paper_title, paper_url, paper_summary, full_text, paper_keywords)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (user_id, paper_title, paper_url, paper_summary, full_text, paper_keywords))
-    conn.commit()
-    conn.close()
+    with _write_lock:
+        conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO pending_papers 
+            (user_id, paper_title, paper_url, paper_summary, full_text, paper_keywords)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, paper_title, paper_url, paper_summary, full_text, paper_keywords))
+        conn.commit()
+        conn.close()
     print(f"✅ Pending paper eklendi: {paper_title}")
 
 
 def get_pending_paper(user_id):
     """Kullanıcının bekleyen makalesini getirir"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     cursor.execute("""
@@ -469,7 +580,7 @@ def get_pending_paper(user_id):
 
 def delete_pending_paper(paper_id):
     """İşlenen pending makaleyi siler"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("DELETE FROM pending_papers WHERE id = ?", (paper_id,))
     conn.commit()
@@ -478,7 +589,7 @@ def delete_pending_paper(paper_id):
 
 def get_user_by_whatsapp_phone(phone):
     """WhatsApp numarasına göre kullanıcı bulur"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users WHERE whatsapp_phone = ?", (phone,))
@@ -489,7 +600,7 @@ def get_user_by_whatsapp_phone(phone):
 
 def update_user_whatsapp_phone(user_id, whatsapp_phone):
     """Kullanıcının WhatsApp numarasını günceller"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=DB_TIMEOUT)
     cursor = conn.cursor()
     cursor.execute("UPDATE users SET whatsapp_phone = ? WHERE id = ?", (whatsapp_phone, user_id))
     conn.commit()
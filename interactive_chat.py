@@ -3,7 +3,8 @@ import logging
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import ApplicationBuilder, ContextTypes, MessageHandler, filters
-from modules.feed_engine.processor import get_model
+from modules.feed_engine.processor import get_model, ask_model_async
+from modules.feed_engine.prompt_budget import qa_context
 import paper_cache  # YENİ: RAM tabanlı geçici hafıza
 
 load_dotenv()
@@ -51,7 +52,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     GÖREV: Sen bir akademik asistansın. Aşağıdaki makale hakkında kullanıcının sorusunu cevapla.
     
     MAKALE: {paper_title}
-    İÇERİK: {content[:50000]}
+    İÇERİK: {qa_context(content, text)}
     
     KULLANICI SORUSU: {text}
     
@@ -62,11 +63,10 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     4. Cevap kısa ve öz olsun (maksimum 4000 karakter).
     """
     
-    try:
-        response = model.generate_content(prompt)
-        reply_text = response.text
-    except Exception as e:
-        reply_text = f"⚠️ Bir hata oluştu: {str(e)}"
+    # Öncelikli şerit: tarama özetlerinin arkasında beklemez, süre dolarsa iptal edilir
+    reply_text = await ask_model_async(prompt, "interactive")
+    if not reply_text:
+        reply_text = "⚠️ Şu an cevap üretemedim, lütfen biraz sonra tekrar deneyin."
         
     # 3. Cevabı Gönder
     # Telegram Markdown hatalarına karşı düz metin fallback
@@ -1,27 +1,68 @@
 import edge_tts
-import asyncio
 import os
 import re
-import google.generativeai as genai
-import wave
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-# FFmpeg ve Pydub
+from modules.feed_engine import audio_cache, audio_service, llm_client
+from modules.feed_engine.throttle import service_slot
+
+# FFmpeg (static_ffmpeg varsa binary'leri path'e ekler, yoksa sistemdeki ffmpeg kullanılır)
 try:
     import static_ffmpeg
-    static_ffmpeg.add_paths()  # FFmpeg binary'lerini path'e ekle
-    from pydub import AudioSegment
-    FFMPEG_AVAILABLE = True
-    print("✅ FFmpeg yüklendi ve hazır.")
-except ImportError as e:
-    print(f"⚠️ FFmpeg/Pydub hatası: {e}")
-    FFMPEG_AVAILABLE = False
+    static_ffmpeg.add_paths()
+except ImportError:
+    pass
 except Exception as e:
     print(f"⚠️ FFmpeg başlatma hatası: {e}")
-    FFMPEG_AVAILABLE = False
+
+FFMPEG_PATH = shutil.which("ffmpeg")
+FFMPEG_AVAILABLE = FFMPEG_PATH is not None
+if FFMPEG_AVAILABLE:
+    print("✅ FFmpeg yüklendi ve hazır.")
+else:
+    print("⚠️ FFmpeg bulunamadı: Gemini sesi dönüştürülemez, EdgeTTS kullanılacak.")
 
 load_dotenv()
 
+# Gemini ses çıktısı: 24 kHz, 16-bit, mono ham PCM
+PCM_RATE = 24000
+PCM_CHANNELS = 1
+
+# Çıkış biçimleri: mp3 (Telegram) ve ogg/opus (WhatsApp sesli notu, MP3'ten kat kat küçük)
+OUTPUT_FORMATS = {
+    "mp3": ["-c:a", "libmp3lame", "-b:a", "64k", "-f", "mp3"],
+    "ogg": ["-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-f", "ogg"],
+}
+TRANSCODE_TIMEOUT = 120
+
+# Uzun özetler cümle sınırından parçalara bölünüp paralel seslendirilir;
+# toplam süre en uzun parçanın süresine yaklaşır, hata veren parça tek başına tekrar denenir.
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "700"))
+TTS_CHUNK_WORKERS = int(os.getenv("TTS_CHUNK_WORKERS", "3"))
+TTS_CHUNK_RETRIES = int(os.getenv("TTS_CHUNK_RETRIES", "2"))
+EDGE_TIMEOUT = 120
+
+# Gemini ses kotası (gemini_audio kovası) için parça başına en fazla bekleme (saniye).
+# Süre dolarsa Gemini bırakılır ve EdgeTTS'e geçilir; webhook taramanın ses işlerinin arkasında kalmaz.
+TTS_QUOTA_TIMEOUTS = {
+    "interactive": float(os.getenv("TTS_QUOTA_TIMEOUT_WEB", "10")),
+    "web": float(os.getenv("TTS_QUOTA_TIMEOUT_WEB", "10")),
+    "batch": float(os.getenv("TTS_QUOTA_TIMEOUT_BATCH", "120")),
+}
+SENTENCE_END = re.compile(r'(?<=[\.\!\?…])\s+')
+
+EDGE_VOICE = 'tr-TR-AhmetNeural'
+GEMINI_AUDIO_MODEL = 'gemini-2.0-flash-exp'  # Model güncellendi (deprecated uyarısı için)
+GEMINI_VOICES = {
+    "samimi": "Puck",
+    "resmi": "Fenrir",
+    "orta": "Kore",
+    "dogal": "Aoede"
+}
+
 # Emojileri ve Markdown işaretlerini temizleme fonksiyonu
 def clean_text_for_audio(text):
     # 1. Markdown kalınlaştırmaları sil (**text** -> text)
@@ -36,79 +77,172 @@ def clean_text_for_audio(text):
     return text
 
 
-async def generate_audio_file(text, filename):
-    """ EdgeTTS ile ses oluşturur (MP3) """
-    voice = 'tr-TR-AhmetNeural'
-    clean_text = clean_text_for_audio(text)
-    communicate = edge_tts.Communicate(clean_text, voice)
-    await communicate.save(filename)
+def split_for_tts(text, max_chars=None):
+    """Metni cümle sınırlarından en fazla max_chars uzunluğunda parçalara böler."""
+    max_chars = max_chars or TTS_CHUNK_CHARS
+    chunks = []
+    current = ""
+    for sentence in SENTENCE_END.split(" ".join(text.split())):
+        # Tek başına çok uzun cümle virgül / boşluktan bölünür
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(", ", 0, max_chars)
+            if cut < max_chars // 2:
+                cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                # Boşluk da yok: tam max_chars'tan kesilir
+                piece, sentence = sentence[:max_chars].strip(), sentence[max_chars:].strip()
+            else:
+                # Ayraç (virgül / boşluk) parçada kalır
+                piece, sentence = sentence[:cut + 1].strip(), sentence[cut + 1:].strip()
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(piece)
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
 
 
-def save_pcm_as_wav(pcm_data, filename):
-    try:
-        with wave.open(filename, 'wb') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit PCM
-            wav_file.setframerate(24000) 
-            wav_file.writeframes(pcm_data)
-        return True
-    except Exception as e:
-        print(f"❌ WAV Kayıt Hatası: {e}")
-        return False
+def _synthesize_chunks(chunks, synthesize, label):
+    """
+    synthesize(parça) -> baytlar; parçalar paralel çalışır, sadece başarısız olanlar tekrar denenir.
+    Dönen: sıralı bayt listesi; bir parça tüm denemelerde başarısızsa None
+    Kota beklemesi dolarsa (QuotaTimeoutError) tekrar denenmez, hata çağırana iletilir.
+    """
+    def safe(chunk):
+        try:
+            return synthesize(chunk)
+        except llm_client.QuotaTimeoutError:
+            raise
+        except Exception as e:
+            print(f"⚠️ {label} parça hatası: {e}")
+            return None
+
+    results = [None] * len(chunks)
+    pending = list(range(len(chunks)))
+    for attempt in range(1 + TTS_CHUNK_RETRIES):
+        if not pending:
+            break
+        if attempt:
+            print(f"🔁 {label}: {len(pending)}/{len(chunks)} parça tekrar deneniyor...")
+        with ThreadPoolExecutor(max_workers=max(1, min(TTS_CHUNK_WORKERS, len(pending)))) as executor:
+            for i, data in zip(pending, executor.map(safe, [chunks[i] for i in pending])):
+                results[i] = data
+        pending = [i for i in pending if not results[i]]
+    if pending:
+        print(f"❌ {label}: {len(pending)} parça seslendirilemedi.")
+        return None
+    return results
 
 
-def convert_wav_to_mp3(wav_filename, mp3_filename):
-    """WAV dosyasını MP3'e çevirir (WhatsApp uyumluluğu için)"""
+async def generate_audio_bytes(text):
+    """ EdgeTTS ile ses oluşturur (MP3 baytları, diske yazmadan) """
+    clean_text = clean_text_for_audio(text)
+    communicate = edge_tts.Communicate(clean_text, EDGE_VOICE)
+    chunks = []
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            chunks.append(chunk["data"])
+    return b"".join(chunks)
+
+
+def transcode(data, fmt="mp3", input_format="s16le"):
+    """
+    Ses baytlarını ffmpeg'e pipe ile verip kodlanmış çıktıyı bellekte okur (disk yok).
+    input_format: "s16le" (Gemini ham PCM) veya "mp3" (EdgeTTS)
+    Dönen: kodlanmış baytlar ya da None
+    """
     if not FFMPEG_AVAILABLE:
         print("❌ Dönüşüm yapılamıyor: FFmpeg yok.")
-        return False
-        
+        return None
+    if input_format == "s16le":
+        input_args = ["-f", "s16le", "-ar", str(PCM_RATE), "-ac", str(PCM_CHANNELS)]
+    else:
+        input_args = ["-f", input_format]
+    command = [FFMPEG_PATH, "-hide_banner", "-loglevel", "error", *input_args, "-i", "pipe:0",
+               "-ac", "1", *OUTPUT_FORMATS[fmt], "pipe:1"]
     try:
-        audio = AudioSegment.from_wav(wav_filename)
-        audio.export(mp3_filename, format="mp3")
-        print(f"✅ Dönüşüm Başarılı: {mp3_filename}")
-        
-        # WAV dosyasını sil (isteğe bağlı)
-        try:
-            os.remove(wav_filename)
-        except:
-            pass
-            
-        return True
+        result = subprocess.run(command, input=data, capture_output=True, timeout=TRANSCODE_TIMEOUT)
     except Exception as e:
-        print(f"❌ MP3 Dönüşüm Hatası: {e}")
-        return False
+        print(f"❌ {fmt.upper()} Dönüşüm Hatası: {e}")
+        return None
+    if result.returncode != 0 or not result.stdout:
+        print(f"❌ {fmt.upper()} Dönüşüm Hatası: {result.stderr.decode('utf-8', 'ignore')[:200]}")
+        return None
+    return result.stdout
+
+
+def edge_tts_bytes(text):
+    """EdgeTTS ile tek parça seslendirme (MP3 baytları); ortak ses döngüsünde çalışır."""
+    with service_slot("edge_tts"):
+        return audio_service.get_service().run(generate_audio_bytes(text), timeout=EDGE_TIMEOUT)
+
+
+def generate_edge_audio(text, fmt="mp3"):
+    """EdgeTTS ile parçalı paralel seslendirme; MP3 parçaları uç uca eklenir. Dönen: baytlar ya da None"""
+    segments = _synthesize_chunks(split_for_tts(text), edge_tts_bytes, "EdgeTTS")
+    if not segments:
+        return None
+    # MP3 çerçeve akışları doğrudan birleştirilebilir
+    encoded = b"".join(segments)
+    if fmt != "mp3":
+        encoded = transcode(encoded, fmt=fmt, input_format="mp3")
+    return encoded
 
 
-def generate_gemini_audio(text, filename, style="samimi"):
+def generate_gemini_audio(text, style="samimi", fmt="mp3", priority="batch"):
+    """
+    Gemini ile parçalı paralel seslendirme; ham PCM parçaları birleştirilip tek seferde
+    istenen biçime çevrilir. Dönen: baytlar ya da None (kota beklemesi dolduysa da None)
+    """
+    if not FFMPEG_AVAILABLE:
+        return None
+
     api_key = os.environ.get("GOOGLE_API_KEY")
     if not api_key:
         print("❌ API Key eksik.")
         return None
 
+    chunks = split_for_tts(text)
     try:
-        genai.configure(api_key=api_key)
-        model_name = 'gemini-2.0-flash-exp'  # Model güncellendi (deprecated uyarısı için)
-        
+        pcm_segments = _synthesize_chunks(chunks, lambda chunk: gemini_pcm(chunk, style, priority), "Gemini")
+    except llm_client.QuotaTimeoutError:
+        print(f"⏳ Gemini ses kotası {TTS_QUOTA_TIMEOUTS.get(priority, TTS_QUOTA_TIMEOUTS['batch']):.0f} sn "
+              f"içinde açılmadı ({priority}).")
+        return None
+    if not pcm_segments:
+        return None
+    encoded = transcode(b"".join(pcm_segments), fmt=fmt, input_format="s16le")
+    if encoded:
+        print(f"🎙️ Gemini Sesi ({fmt.upper()}) hazır: {len(chunks)} parça, {len(encoded)} bytes")
+    return encoded
+
+
+def gemini_pcm(text, style="samimi", priority="batch"):
+    """
+    Tek parça Gemini seslendirmesi. Dönen: ham PCM (24 kHz, 16-bit, mono) ya da None
+    Kota TTS_QUOTA_TIMEOUTS içinde alınamazsa QuotaTimeoutError.
+    """
+    try:
+        model_name = GEMINI_AUDIO_MODEL
+
         # Eğer flash-exp yoksa standart modeli deneriz, ama şimdilik kodda kalsın
         # Alternatif: gemini-1.5-flash
-        
-        voice_map = {
-            "samimi": "Puck",
-            "resmi": "Fenrir",
-            "orta": "Kore",
-            "dogal": "Aoede"
-        }
-        selected_voice = voice_map.get(style, "Puck")
-        
-        model = genai.GenerativeModel(model_name)
+
+        selected_voice = GEMINI_VOICES.get(style, "Puck")
         
         # Kullanıcı promptu ile ses isteyelim (yeni API yapısı gerekebilir, 
         # ancak eski kodda generate_content ile speech_config kullanılmış. 
         # deprecated uyarısı aldık ama hala çalışıyorsa devam.)
-        
-        response = model.generate_content(
-            text, 
+        # llm_client: configure bir kez yapılır, model çökükse devre kesici hemen EdgeTTS'e düşürür
+        response = llm_client.generate(
+            text,
+            models=[model_name],
             generation_config={
                 "response_modalities": ["AUDIO"],
                 "speech_config": {
@@ -118,52 +252,91 @@ def generate_gemini_audio(text, filename, style="samimi"):
                         }
                     }
                 }
-            }
+            },
+            service="gemini_audio",
+            raw=True,
+            priority=priority,
+            quota_timeout=TTS_QUOTA_TIMEOUTS.get(priority, TTS_QUOTA_TIMEOUTS["batch"]),
+            raise_on_quota=True
         )
+        if response is None:
+            return None
         
         for part in response.parts:
             if hasattr(part, 'inline_data'):
-                # Önce WAV olarak kaydet
-                wav_filename = filename.replace(".mp3", ".wav")
-                if save_pcm_as_wav(part.inline_data.data, wav_filename):
-                    print(f"🎙️ Gemini Sesi (WAV) Kaydedildi: {wav_filename}")
-                    
-                    # Sonra MP3'e çevir
-                    if convert_wav_to_mp3(wav_filename, filename):
-                        return filename
-                    else:
-                        return wav_filename # Çevrilemezse WAV döndür
-                        
+                return part.inline_data.data
+
         return None
+    except llm_client.QuotaTimeoutError:
+        raise
     except Exception as e:
         print(f"❌ Gemini Ses Hatası ({style}): {e}")
         return None
 
 
-def text_to_speech(text, style="samimi"):
-    print(f"🎙️ Ses Motoru Başlatılıyor ({style})...")
-    
-    filename = "ozet_sesi.mp3"
+def _cached_audio(clean_text, style, fmt):
+    """Motor tercih sırasıyla (Gemini > EdgeTTS) önbellekteki sesi arar."""
+    for engine, voice in (("gemini", GEMINI_VOICES.get(style, "Puck")), ("edge", EDGE_VOICE)):
+        path = audio_cache.get_path(audio_cache.cache_key(clean_text, style, voice, engine), fmt)
+        if path:
+            return path
+    return None
+
+
+def text_to_speech(text, style="samimi", fmt="mp3", priority="batch"):
+    """
+    Özeti seslendirir ve ses önbelleğindeki dosyanın yolunu döndürür (başarısızsa None).
+    fmt: "mp3" (Telegram) veya "ogg" (Opus; WhatsApp sesli notu)
+    priority: Gemini ses kotasında sıra; "web" (webhook) kısa bekler, olmazsa EdgeTTS kullanılır
+    Aynı metin + stil + biçim daha önce seslendirildiyse Gemini / EdgeTTS hiç çağrılmaz.
+    Dönen dosya paylaşımlıdır: çağıran silmemeli.
+    """
+    if fmt not in OUTPUT_FORMATS:
+        fmt = "mp3"
     clean_text = clean_text_for_audio(text)
-    
-    # 1. Önce Gemini Dene (Yüksek Kalite)
-    result_file = generate_gemini_audio(clean_text, filename, style)
-    
-    if result_file and result_file.endswith(".mp3"):
-        return result_file
-    
-    print("⚠️ Gemini başarısız oldu veya WAV döndü, EdgeTTS yedeğine geçiliyor...")
-    
-    # 2. Yedek: EdgeTTS (Zaten MP3 verir)
-    try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(generate_audio_file(text, filename))
-        print(f"💾 EdgeTTS (Yedek) ses kaydedildi: {filename}")
-        return filename
-    except Exception as e:
-        print(f"❌ Yedek Ses Hatası: {e}")
-        return None
+
+    cached = _cached_audio(clean_text, style, fmt)
+    if cached:
+        print(f"⚡ Ses önbellekten ({style}, {fmt}).")
+        return cached
+
+    # Aynı özet için paralel worker'lar tek üretimi bekler
+    with audio_cache.key_lock(audio_cache.request_key(clean_text, style, fmt)):
+        cached = _cached_audio(clean_text, style, fmt)
+        if cached:
+            print(f"⚡ Ses başka bir worker tarafından üretildi ({style}, {fmt}).")
+            return cached
+
+        print(f"🎙️ Ses Motoru Başlatılıyor ({style}, {fmt})...")
+
+        # 1. Önce Gemini Dene (Yüksek Kalite): PCM bellekte doğrudan hedef biçime çevrilir
+        encoded = generate_gemini_audio(clean_text, style, fmt, priority)
+        if encoded:
+            key = audio_cache.cache_key(clean_text, style, GEMINI_VOICES.get(style, "Puck"), "gemini")
+            return audio_cache.store_bytes(encoded, key, fmt)
+
+        print("⚠️ Gemini başarısız oldu, EdgeTTS yedeğine geçiliyor...")
+
+        # 2. Yedek: EdgeTTS (MP3 verir; ogg istenirse bellekte çevrilir)
+        try:
+            encoded = generate_edge_audio(clean_text, fmt)
+            if not encoded:
+                return None
+            print(f"💾 EdgeTTS (Yedek) ses hazır: {len(encoded)} bytes")
+            return audio_cache.store_bytes(encoded, audio_cache.cache_key(clean_text, style, EDGE_VOICE, "edge"), fmt)
+        except Exception as e:
+            print(f"❌ Yedek Ses Hatası: {e}")
+            return None
+
+def submit_speech(text, style="samimi", fmt="mp3", priority="batch"):
+    """
+    text_to_speech'i ses servisinin havuzunda başlatır. Dönen: concurrent.futures.Future (dosya yolu)
+    Tarama ve webhook aynı havuzu kullanır; süreçteki eşzamanlı ses üretimi AUDIO_SERVICE_WORKERS ile sınırlıdır.
+    Asenkron handler'lar sonucu asyncio.wrap_future ile bekleyebilir.
+    """
+    return audio_service.get_service().submit_blocking(text_to_speech, text, style=style, fmt=fmt,
+                                                       priority=priority)
+
 
 if __name__ == "__main__":
     text_to_speech("Bu bir ses testidir.")
\ No newline at end of file
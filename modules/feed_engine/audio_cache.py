@@ -0,0 +1,166 @@
+# FILE: modules/feed_engine/audio_cache.py
+# Seslendirilmiş özetlerin içerik adresli disk önbelleği.
+# Anahtar: (özet metninin SHA-256'sı, stil, ses, motor) -> SHA-256 dosya adı
+# Aynı özet birden fazla hocaya gidiyorsa (veya WhatsApp webhook'u tekrar isterse)
+# Gemini / EdgeTTS bir kez çağrılır.
+#
+# Üretim her zaman benzersiz bir geçici dosyaya yapılır ve os.replace ile atomik olarak
+# yerine konur; eşzamanlı taramalar ve webhook birbirinin dosyasını ezmez.
+# LRU son okunma zamanına (atime) göre işler; yeni verilen dosyalar gönderilmeden silinmesin
+# diye son MIN_AGE saniyede kullanılanlar atılmaz.
+
+import os
+import time
+import uuid
+import hashlib
+import threading
+import weakref
+
+CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "audio_cache")
+MAX_BYTES = int(float(os.getenv("AUDIO_CACHE_MAX_MB", "300")) * 1024 * 1024)
+MIN_AGE = 600
+
+AUDIO_EXTENSIONS = (".mp3", ".ogg", ".wav")
+
+_lock = threading.Lock()
+
+# Zayıf referanslı: son bekleyen bırakınca kilit silinir, uzun çalışan botta sözlük büyümez
+_key_locks = weakref.WeakValueDictionary()
+_key_locks_guard = threading.Lock()
+
+
+def cache_key(text, style, voice, engine):
+    text_hash = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    raw = "|".join([text_hash, style or "", voice or "", engine or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def request_key(text, style, fmt):
+    """
+    Bir ses isteğinin kimliği (motor ve ses seçilmeden önce); key_lock için kullanılır.
+    cache_key'den ayrı bir isim alanındadır, bir dosya adıyla çakışmaz.
+    """
+    text_hash = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    raw = "|".join(["request", text_hash, style or "", fmt or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _path(key, fmt):
+    return os.path.join(CACHE_DIR, f"{key}.{fmt}")
+
+
+def key_lock(key):
+    """Aynı ses için eşzamanlı üretimler tek seferde yapılsın diye anahtar başına kilit."""
+    with _key_locks_guard:
+        # Kilit, dönen referans tutulduğu sürece yaşar
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def get_path(key, fmt="mp3"):
+    """Önbellekteki ses dosyasının yolu; yoksa None."""
+    path = _path(key, fmt)
+    try:
+        stat = os.stat(path)
+        if stat.st_size == 0:
+            return None
+        # LRU: son kullanım zamanını güncelle
+        os.utime(path, (time.time(), stat.st_mtime))
+        return path
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Ses önbelleği okunamadı ({key[:12]}): {e}")
+        return None
+
+
+def temp_path(fmt="mp3"):
+    """Üretim için benzersiz geçici dosya yolu (önbellek klasöründe, aynı dosya sistemi)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, f"tmp-{os.getpid()}-{uuid.uuid4().hex}.{fmt}")
+
+
+def store(tmp_path, key, fmt="mp3"):
+    """
+    Üretilen geçici dosyayı atomik olarak önbelleğe taşır, ardından boyut sınırını uygular.
+    Dönen: önbellekteki yol (taşınamazsa geçici yol)
+    """
+    path = _path(key, fmt)
+    try:
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ Ses önbelleğine yazılamadı ({key[:12]}): {e}")
+        return tmp_path
+    _evict()
+    return path
+
+
+def store_bytes(data, key, fmt="mp3"):
+    """Bellekteki kodlanmış sesi benzersiz geçici dosyaya yazıp atomik olarak önbelleğe koyar."""
+    tmp_path = temp_path(fmt)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+    except Exception as e:
+        print(f"⚠️ Ses önbelleğine yazılamadı ({key[:12]}): {e}")
+        discard(tmp_path)
+        return None
+    return store(tmp_path, key, fmt)
+
+
+def discard(tmp_path):
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def _evict():
+    """Toplam boyut MAX_BYTES'ı aşarsa en az kullanılan sesleri siler."""
+    now = time.time()
+    with _lock:
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(CACHE_DIR)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if name.startswith("tmp-"):
+                # Çöken üretimlerden kalan geçici dosyalar
+                if now - stat.st_mtime > 3600:
+                    discard(path)
+                continue
+            if not name.endswith(AUDIO_EXTENSIONS):
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= MAX_BYTES:
+            return
+        entries.sort()
+        for atime, size, path in entries:
+            if total <= MAX_BYTES:
+                break
+            if now - atime < MIN_AGE:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+def stats():
+    count = 0
+    total = 0
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if name.endswith(AUDIO_EXTENSIONS) and not name.startswith("tmp-"):
+                count += 1
+                total += os.path.getsize(os.path.join(CACHE_DIR, name))
+    return {"entries": count, "bytes": total, "max_bytes": MAX_BYTES, "path": CACHE_DIR}
@@ -0,0 +1,95 @@
+# FILE: modules/feed_engine/audio_service.py
+# Ses işleri için uzun ömürlü olay döngüsü (asyncio loop) thread'i.
+# EdgeTTS her çağrıda yeni bir event loop açmak yerine bu döngüde çalışır; böylece
+# Telegram botunun kendi döngüsüyle aynı thread'de loop sahipliği çakışması olmaz.
+#
+# Thread-safe API (her thread'den ve asenkron handler'lardan çağrılabilir):
+#   submit(coro)              -> concurrent.futures.Future  (coroutine servis döngüsünde çalışır)
+#   submit_blocking(fn, ...)  -> concurrent.futures.Future  (bloklayan iş servis havuzunda çalışır)
+#   run(coro, timeout)        -> sonuç (senkron kod için kısayol)
+
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+WORKERS = int(os.getenv("AUDIO_SERVICE_WORKERS", "4"))
+
+
+class AudioService:
+    def __init__(self, workers=WORKERS):
+        self.workers = max(1, workers)
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._ready.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="audio-service")
+            self._thread = threading.Thread(target=self._run_loop, name="audio-service-loop", daemon=True)
+            self._thread.start()
+        self._ready.wait()
+
+    def in_service_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro):
+        """Coroutine'i servis döngüsünde çalıştırır. Dönen: concurrent.futures.Future"""
+        self.start()
+        if self.in_service_thread():
+            coro.close()
+            raise RuntimeError("audio_service.submit servis döngüsünün içinden beklenemez.")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def submit_blocking(self, fn, *args, **kwargs):
+        """Bloklayan işi (Gemini + ffmpeg) servis havuzunda çalıştırır. Dönen: Future"""
+        self.start()
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def run(self, coro, timeout=None):
+        """Senkron koddan: coroutine'i servis döngüsünde çalıştırıp sonucu bekler."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            if not self._thread:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._executor.shutdown(wait=False)
+            self._thread = None
+            self._executor = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = AudioService()
+    return _service
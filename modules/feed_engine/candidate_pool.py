@@ -0,0 +1,182 @@
+# FILE: modules/feed_engine/candidate_pool.py
+# Tarama başına ortak makale havuzu.
+# Her kategori ve her (normalize edilmiş) anahtar kelime sorgusu tarama boyunca
+# yalnızca BİR kez çekilir; kullanıcılar kendi birleşimlerini bellekten alır.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.feed_engine.scraper import search_arxiv_by_code, search_semantic_scholar_by_keyword
+from modules.feed_engine.vector_engine import rank_papers_for_users
+
+
+def split_categories(interests_code):
+    """'cs.AI, eess.SP' -> ['cs.AI', 'eess.SP'] (boşları ve tekrarları atar)"""
+    if not interests_code:
+        return []
+    categories = []
+    for c in interests_code.split(","):
+        c = c.strip()
+        if c and c not in categories:
+            categories.append(c)
+    return categories
+
+
+def normalize_keywords(keywords_text):
+    """
+    Anahtar kelime sorgusunu tekilleştirme için normalize eder (sadece havuz anahtarı).
+    'Radar,  deep learning' ile 'deep learning, radar' aynı sorguya düşer.
+    Semantic Scholar'a kullanıcının yazdığı özgün metin gönderilir.
+    """
+    if not keywords_text:
+        return ""
+    terms = sorted({" ".join(t.lower().split()) for t in keywords_text.split(",")} - {""})
+    return ", ".join(terms)
+
+
+def _clean_title(title):
+    # get_latest_papers ile aynı tekilleştirme anahtarı
+    return "".join(title.lower().split())
+
+
+class CandidatePool:
+    """
+    Bir tarama süresince yaşayan makale havuzu.
+
+    Kullanım:
+        pool = CandidatePool(limit=50)
+        pool.prefetch(users)
+        pool.rank_users(threshold=1.6)
+        eslesmeler = pool.get_ranked_papers(user['id'], user['interests'], user['keywords'])
+    """
+
+    def __init__(self, limit=50):
+        self.limit = limit
+        self._arxiv = {}      # kategori -> [makale]
+        self._semantic = {}   # normalize sorgu -> [makale] (sorgu metni kullanıcının özgün yazımı)
+        self._ranked_papers = []
+        self._ranking = {}    # user_id -> [(paper_index, distance)]
+        self._lock = threading.Lock()
+        self._key_locks = {}  # (kaynak, anahtar) -> Lock (aynı sorgu iki kez çekilmesin)
+
+    def prefetch(self, users, workers=1):
+        """
+        Tüm kullanıcıların kategori ve sorgularını tek seferde çeker.
+        workers > 1 ise ArXiv ve Semantic Scholar sorguları paralel yürür
+        (servis başına sınırlar throttle modülünde).
+        """
+        categories = []
+        queries = {}  # normalize anahtar -> ilk kullanıcının özgün sorgusu
+        for user in users:
+            for c in split_categories(user['interests']):
+                if c not in categories:
+                    categories.append(c)
+            key = normalize_keywords(user['keywords'])
+            if key and key not in queries:
+                queries[key] = user['keywords']
+
+        print(f"📦 Havuz hazırlanıyor: {len(categories)} kategori, {len(queries)} sorgu "
+              f"({len(users)} kullanıcı için)")
+        jobs = [(self._get_arxiv, c) for c in categories] + [(self._get_semantic, q) for q in queries.values()]
+        if workers <= 1:
+            for fetch, arg in jobs:
+                fetch(arg)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda job: job[0](job[1]), jobs))
+
+    def _fetch_once(self, source, store, key, fetch):
+        # Aynı anahtar için yalnızca bir thread ağ isteği yapar, diğerleri sonucu bekler
+        with self._lock:
+            if key in store:
+                return store[key]
+            key_lock = self._key_locks.setdefault((source, key), threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in store:
+                    return store[key]
+            result = fetch()
+            with self._lock:
+                store[key] = result
+            return result
+
+    def _get_arxiv(self, category):
+        return self._fetch_once("arxiv", self._arxiv, category,
+                                lambda: search_arxiv_by_code(category, limit=self.limit // 2))
+
+    def _get_semantic(self, keywords_text):
+        # Havuz anahtarı normalize edilmiş hal, API'ye giden sorgu özgün metin (baseline ile aynı)
+        return self._fetch_once("semantic", self._semantic, normalize_keywords(keywords_text),
+                                lambda: search_semantic_scholar_by_keyword(keywords_text, limit=self.limit // 2))
+
+    def get_papers(self, interests_code, keywords_text):
+        """
+        get_latest_papers ile aynı çıktıyı (eşsiz makale listesi) havuzdan üretir.
+        Havuzda olmayan kategori/sorgu gelirse bir kez çekilip havuza eklenir.
+        """
+        # 1. ArXiv: kategorilerin birleşimi, en yeniler önde (tek OR sorgusundaki gibi)
+        arxiv_papers = []
+        for c in split_categories(interests_code):
+            arxiv_papers.extend(self._get_arxiv(c))
+        arxiv_papers.sort(key=lambda p: p.get('published', ''), reverse=True)
+
+        seen_titles = set()
+        merged_arxiv = []
+        for paper in arxiv_papers:
+            t = _clean_title(paper['title'])
+            if t not in seen_titles:
+                seen_titles.add(t)
+                merged_arxiv.append(paper)
+        merged_arxiv = merged_arxiv[:self.limit // 2]
+
+        # 2. Semantic Scholar
+        semantic_papers = self._get_semantic(keywords_text) if normalize_keywords(keywords_text) else []
+
+        # 3. Birleştirme ve Tekilleştirme
+        unique_papers = []
+        seen_titles = set()
+        for paper in merged_arxiv + semantic_papers:
+            t = _clean_title(paper['title'])
+            if t not in seen_titles:
+                seen_titles.add(t)
+                unique_papers.append(paper)
+
+        return unique_papers
+
+    def all_papers(self):
+        """Havuzdaki tüm eşsiz makaleler (kullanıcılardan bağımsız)."""
+        with self._lock:
+            lists = list(self._arxiv.values()) + list(self._semantic.values())
+        unique_papers = []
+        seen_titles = set()
+        for papers in lists:
+            for paper in papers:
+                t = _clean_title(paper['title'])
+                if t not in seen_titles:
+                    seen_titles.add(t)
+                    unique_papers.append(paper)
+        return unique_papers
+
+    def rank_users(self, threshold=1.5):
+        """
+        Havuzdaki tüm makaleleri tüm kullanıcılara karşı tek seferde puanlar.
+        prefetch'ten sonra, kullanıcılar işlenmeden önce çağrılmalıdır.
+        """
+        papers = self.all_papers()
+        ranking = rank_papers_for_users([p['abstract'] for p in papers], threshold=threshold)
+        with self._lock:
+            self._ranked_papers = papers
+            self._ranking = ranking
+
+    def get_ranked_papers(self, user_id, interests_code, keywords_text):
+        """
+        Kullanıcının kendi aday listesindeki, eşik altında kalan makaleleri
+        en yakından en uzağa sıralı döndürür: [(makale, mesafe), ...]
+        """
+        candidates = {_clean_title(p['title']) for p in self.get_papers(interests_code, keywords_text)}
+        ranked = []
+        for index, distance in self._ranking.get(user_id, []):
+            paper = self._ranked_papers[index]
+            if _clean_title(paper['title']) in candidates:
+                ranked.append((paper, distance))
+        return ranked
@@ -0,0 +1,117 @@
+# FILE: modules/feed_engine/embedding_cache.py
+# Kalıcı embedding önbelleği.
+# Anahtar: (model adı, normalize edilmiş metnin SHA-256'sı)
+# Değer: float32 blob. En az kullanılanlar (LRU) MAX_ENTRIES aşılınca silinir.
+# Aynı ArXiv özeti günlerce listelerde kaldığı için encode sadece yeni metinde yapılır.
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db")
+MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+_lock = threading.Lock()
+_initialized = False
+
+
+def _connect():
+    global _initialized
+    conn = sqlite3.connect(CACHE_PATH, timeout=30)
+    if not _initialized:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                dim INTEGER,
+                vector BLOB,
+                last_used REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        conn.commit()
+        _initialized = True
+    return conn
+
+
+def normalize_text(text):
+    """Boşluk farklarını yok sayar: aynı özet farklı satır kırılımlarıyla gelebilir."""
+    return " ".join((text or "").split())
+
+
+def cache_key(model_name, text):
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model_name}:{digest}"
+
+
+def get_many(model_name, texts):
+    """
+    Dönen: texts ile aynı uzunlukta liste; önbellekte olmayanlar için None.
+    """
+    keys = [cache_key(model_name, t) for t in texts]
+    found = {}
+    with _lock:
+        conn = _connect()
+        try:
+            unique_keys = list(dict.fromkeys(keys))
+            # SQLite parametre sınırı için parça parça sorgula
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                 [(now, k) for k in found])
+                conn.commit()
+        finally:
+            conn.close()
+    return [found.get(k) for k in keys]
+
+
+def put_many(model_name, texts, vectors):
+    """Yeni vektörleri kaydeder ve gerekirse en eski kayıtları siler."""
+    if not texts:
+        return
+    now = time.time()
+    rows = []
+    for text, vector in zip(texts, vectors):
+        vector = np.asarray(vector, dtype=np.float32)
+        rows.append((cache_key(model_name, text), model_name, int(vector.shape[0]), vector.tobytes(), now))
+
+    with _lock:
+        conn = _connect()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > MAX_ENTRIES:
+                conn.execute("""
+                    DELETE FROM embeddings WHERE key IN (
+                        SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?
+                    )
+                """, (count - MAX_ENTRIES,))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def stats():
+    with _lock:
+        conn = _connect()
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        finally:
+            conn.close()
+    return {"entries": count, "max_entries": MAX_ENTRIES, "path": CACHE_PATH}
@@ -0,0 +1,90 @@
+# FILE: modules/feed_engine/embedding_server.py
+# Yerel embedding sunucusu: modeli tek süreçte yükler, diğer süreçler HTTP ile kullanır.
+# Böylece Flask, Telegram botu ve WhatsApp botu ayrı ayrı model kopyası tutmaz.
+#
+# Başlatma:
+#   python -m modules.feed_engine.embedding_server --port 8765
+# İstemciler:
+#   EMBEDDING_SERVER_URL=http://127.0.0.1:8765
+#
+# Protokol (aynı protokolü konuşan herhangi bir sunucu yerine geçebilir):
+#   POST /encode  {"model": "...", "texts": ["..."], "batch_size": 64, "normalize": true}
+#                                                    -> {"model": "...", "vectors": [[...]]}
+#   GET  /health                                     -> {"status": "ok", "model": "..."}
+
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from modules.feed_engine.vector_engine import MODEL_NAME, encode_locally, get_embedding_model
+
+MAX_TEXTS_PER_REQUEST = 1024
+
+# Model çağrıları sırayla yapılır; istekler yine de paralel kabul edilir
+_encode_lock = threading.Lock()
+
+
+class EmbeddingHandler(BaseHTTPRequestHandler):
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "model": MODEL_NAME})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/encode":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length) or b"{}")
+            texts = data.get("texts") or []
+            if data.get("model", MODEL_NAME) != MODEL_NAME:
+                self._send_json(400, {"error": f"Bu sunucu sadece {MODEL_NAME} modelini sunar."})
+                return
+            if len(texts) > MAX_TEXTS_PER_REQUEST:
+                self._send_json(413, {"error": f"En fazla {MAX_TEXTS_PER_REQUEST} metin gönderilebilir."})
+                return
+            vectors = []
+            if texts:
+                with _encode_lock:
+                    vectors = encode_locally([str(t) for t in texts],
+                                             batch_size=data.get("batch_size"),
+                                             normalize=bool(data.get("normalize", True)))
+            self._send_json(200, {"model": MODEL_NAME, "vectors": [list(map(float, v)) for v in vectors]})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        # Her istek için konsola yazmasın
+        pass
+
+
+def serve(host="127.0.0.1", port=8765):
+    get_embedding_model()  # Modeli ilk istekten önce yükle
+    server = ThreadingHTTPServer((host, port), EmbeddingHandler)
+    print(f"🧠 Embedding sunucusu hazır: http://{host}:{port} ({MODEL_NAME})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🛑 Embedding sunucusu kapatılıyor.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    serve(args.host, args.port)
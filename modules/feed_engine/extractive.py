@@ -0,0 +1,141 @@
+# FILE: modules/feed_engine/extractive.py
+# Yerel (CPU) çıkarımsal özetleyici.
+# Gemini zincirinin tamamı başarısız olduğunda özür metni yerine makalenin kendi
+# cümlelerinden deterministik bir özet üretir; kota harcamaz.
+# SUMMARY_KISA_MODE=extractive ile "kisa" özetler için ucuz ilk geçiş olarak da kullanılır.
+#
+# Puan = merkezilik (TextRank) x bölüm ağırlığı (+ detaylıda sayısal sonuç bonusu);
+# aynı şeyi söyleyen cümleler (MMR) elenir, seçilenler orijinal sırada alıntılanır.
+# Alıntı İngilizce olduğundan bu özetler seslendirilmez (bkz. is_extractive).
+
+import re
+
+import numpy as np
+
+from modules.feed_engine.sections import parse_document
+from modules.feed_engine.prompt_budget import section_units, tfidf, rank_sentences, split_sentences
+
+# Detay seviyesine göre hedef uzunluk (kelime) ve en fazla cümle
+DETAIL_TARGETS = {
+    "kisa": {"words": 70, "sentences": 3},
+    "orta": {"words": 200, "sentences": 8},
+    "detayli": {"words": 420, "sentences": 16},
+}
+
+# Bölüm türü ağırlıkları; detaylı özette yöntem ve deney bölümleri öne çıkar
+SECTION_WEIGHTS = {
+    "abstract": 1.0, "conclusion": 0.9, "results": 0.85, "experiments": 0.7, "discussion": 0.6,
+    "introduction": 0.6, "method": 0.55, "keywords": 0.1, "related": 0.2, "other": 0.4,
+}
+# Başlık / yazar bilgisi girişte zaten okunuyor
+SKIP_KINDS = {"front"}
+DETAILED_WEIGHTS = {"method": 0.85, "experiments": 0.9, "results": 1.0}
+
+# Aday cümlede bundan fazla benzerlik varsa tekrar sayılır
+REDUNDANCY_THRESHOLD = 0.6
+
+MIN_WORDS, MAX_WORDS = 6, 60
+
+CITATION = re.compile(r'\s*(?:\[[\d,\s\-–]+\],?\s*)+|\s*\((?:[A-Z][^()]{0,60}?(?:et al\.)?,?\s*\d{4}[a-z]?;?\s*)+\)')
+NUMERIC_RESULT = re.compile(r'\d+(?:\.\d+)?\s*(%|percent|dB|x\b|times)|\b(accuracy|f1|auc|bleu|improv\w*|outperform\w*)\b',
+                            re.IGNORECASE)
+
+INTROS = {
+    "resmi": "Hocam, '{title}' başlıklı yeni bir çalışmayı bilgilerinize sunarım.",
+    "orta": "Hocam merhaba, '{title}' başlıklı yeni bir çalışma var.",
+    "dogal": "Hocam selam, '{title}' diye bir çalışma çıkmış.",
+    "samimi": "Hocam merhaba! '{title}' başlıklı yeni bir çalışma var.",
+}
+# Seçilen cümleler çevrilmez; okuyan alıntı olduğunu bilsin
+QUOTE_LABEL = "Makalenin özgün (İngilizce) ifadeleriyle öne çıkanlar:"
+OUTROS = {
+    "kisa": "Bu kısa özet makalenin kendi cümlelerinden otomatik derlendi.",
+    "orta": "Bu özet makalenin kendi cümlelerinden otomatik derlendi.",
+    "detayli": "Bu ayrıntılı özet makalenin yöntem ve sonuç cümlelerinden otomatik derlendi.",
+}
+
+
+def _clean(sentence):
+    """Atıfları ve fazla boşlukları temizler."""
+    sentence = CITATION.sub("", sentence)
+    sentence = " ".join(sentence.split()).replace(" ,", ",").replace(" .", ".")
+    return re.sub(r',+(?=[\.;:])', '', sentence)
+
+
+def _readable(sentence):
+    """Formül, tablo ve şekil artıklarını eler (sesli okunamaz)."""
+    words = sentence.split()
+    if not MIN_WORDS <= len(words) <= MAX_WORDS:
+        return False
+    letters = sum(c.isalpha() for c in sentence)
+    if letters < 0.7 * len(sentence.replace(" ", "")):
+        return False
+    return not re.match(r'^(fig\.?|figure|table|algorithm|eq\.?)\s*\d', sentence, re.IGNORECASE)
+
+
+def _candidates(document, abstract, detail_level):
+    """(cümle, ağırlık) listesi; belge yoksa yalnızca abstract kullanılır."""
+    weights = dict(SECTION_WEIGHTS)
+    if detail_level == "detayli":
+        weights.update(DETAILED_WEIGHTS)
+
+    units = []
+    has_abstract = False
+    if document and document.get("sections"):
+        sections, per_section = section_units(document)
+        for s, sentences in zip(sections, per_section):
+            if s["kind"] in SKIP_KINDS:
+                continue
+            has_abstract = has_abstract or (s["kind"] == "abstract" and bool(sentences))
+            units.extend((sentence, weights.get(s["kind"], 0.4)) for sentence in sentences)
+    if abstract and not has_abstract:
+        # PDF'te Abstract bölümü bulunamadıysa kaynaktaki özet (abstract) eklenir
+        units = [(sentence, weights["abstract"]) for sentence in split_sentences(abstract)] + units
+    return [(_clean(sentence), weight) for sentence, weight in units if _readable(_clean(sentence))]
+
+
+def extract_sentences(document=None, abstract=None, detail_level="orta"):
+    """Hedef uzunluğa sığan, tekrarsız, orijinal sırada cümleler."""
+    target = DETAIL_TARGETS.get(detail_level, DETAIL_TARGETS["orta"])
+    units = _candidates(document, abstract, detail_level)
+    if not units:
+        return []
+    sentences = [sentence for sentence, _ in units]
+    scores = rank_sentences(sentences) * np.array([weight for _, weight in units], dtype=np.float32)
+    if detail_level == "detayli":
+        scores *= np.array([1.25 if NUMERIC_RESULT.search(s) else 1.0 for s in sentences], dtype=np.float32)
+
+    matrix, _ = tfidf(sentences)
+    chosen = []
+    words = 0
+    for i in sorted(range(len(sentences)), key=lambda i: (-scores[i], i)):
+        if len(chosen) >= target["sentences"] or words >= target["words"]:
+            break
+        length = len(sentences[i].split())
+        if chosen and words + length > target["words"] * 1.2:
+            continue
+        if matrix is not None and chosen and float((matrix[chosen] @ matrix[i]).max()) > REDUNDANCY_THRESHOLD:
+            continue
+        chosen.append(i)
+        words += length
+    return [sentences[i] for i in sorted(chosen)]
+
+
+def summarize(paper_data, full_text=None, document=None, style="samimi", detail_level="orta"):
+    """
+    Makale için konuşma çerçeveli çıkarımsal özet. Hiç cümle bulunamazsa None.
+    document: pdf_engine.download_and_extract_document çıktısı (yoksa full_text bölümlenir)
+    """
+    if document is None and full_text:
+        document = parse_document(full_text)
+    sentences = extract_sentences(document, paper_data.get('abstract'), detail_level)
+    if not sentences:
+        return None
+    intro = INTROS.get(style, INTROS["samimi"]).format(title=paper_data.get('title', '').strip())
+    outro = OUTROS.get(detail_level, OUTROS["orta"])
+    return f"{intro} {QUOTE_LABEL}\n\n“{' '.join(sentences)}”\n\n{outro}"
+
+
+def is_extractive(summary):
+    """Özet bu modülde üretildiyse True (İngilizce alıntı içerir, Türkçe sesle okutulmaz)."""
+    return bool(summary) and QUOTE_LABEL in summary and summary.rstrip().endswith(tuple(OUTROS.values()))
@@ -0,0 +1,261 @@
+# FILE: modules/feed_engine/llm_batch.py
+# Gece taraması için toplu (batch) LLM gönderimi.
+# Tarama tüm özet isteklerini toplar, tek bir batch işi olarak arka uca verir,
+# tamamlanana kadar yoklar (polling) ve sonuçları teslim aşamasına dağıtır.
+#
+# Arka uçlar (LLM_BATCH_BACKEND):
+#   local -> İşleri bu süreçte llm_scheduler'ın batch şeridinde paralel çalıştırır (varsayılan, stand-in)
+#   http  -> Aynı protokolü konuşan bir batch sunucusu (LLM_BATCH_URL)
+#
+# HTTP protokolü:
+#   POST /batches               {"requests": [{"key", "prompt", "generation_config"}]} -> {"id": "..."}
+#   GET  /batches/<id>          -> {"state": "running|succeeded|failed|cancelled", "done": n, "total": m}
+#   GET  /batches/<id>/results  -> {"results": {"<key>": "metin" | null}}
+#   DELETE /batches/<id>        -> bekleyen istekler iptal edilir (zaman aşımında çağrılır)
+#
+# Test için stand-in sunucu:
+#   python -m modules.feed_engine.llm_batch --port 8766
+#   LLM_BATCH_BACKEND=http LLM_BATCH_URL=http://127.0.0.1:8766
+
+import os
+import json
+import time
+import uuid
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from modules.feed_engine import llm_client, llm_scheduler
+
+BACKEND = os.getenv("LLM_BATCH_BACKEND", "local")
+BATCH_URL = os.getenv("LLM_BATCH_URL", "http://127.0.0.1:8766")
+POLL_INTERVAL = float(os.getenv("LLM_BATCH_POLL_INTERVAL", "10"))
+BATCH_TIMEOUT = float(os.getenv("LLM_BATCH_TIMEOUT", "3600"))
+
+
+class LocalBatchBackend:
+    """
+    İstekleri bu süreçteki llm_scheduler'a batch önceliğiyle verir.
+    Eşzamanlılık zamanlayıcının batch sınırıdır (LLM_SCHEDULER_WORKERS - 1); interactive
+    istekler için bir worker her zaman boş kalır. İptalde henüz başlamamış istekler çalışmaz.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, batch_requests):
+        job_id = uuid.uuid4().hex
+        job = {"state": "running" if batch_requests else "succeeded", "total": len(batch_requests),
+               "results": {}, "futures": []}
+        with self._lock:
+            self._jobs[job_id] = job
+        threading.Thread(target=self._enqueue, args=(job, batch_requests), daemon=True).start()
+        return job_id
+
+    def _enqueue(self, job, batch_requests):
+        # Batch kuyruğu doluysa submit bekler; bu yüzden kuyruğa verme arka planda yapılır
+        scheduler = llm_scheduler.get_scheduler()
+        for request in batch_requests:
+            with self._lock:
+                if job["state"] == "cancelled":
+                    return
+            future = scheduler.submit(_generate_call(request), priority="batch")
+            with self._lock:
+                job["futures"].append(future)
+                cancelled = job["state"] == "cancelled"
+            if cancelled:
+                future.cancel()
+                return
+            future.add_done_callback(lambda f, key=request["key"]: self._collect(job, key, f))
+
+    def _collect(self, job, key, future):
+        if future.cancelled():
+            return
+        try:
+            text = future.result()
+        except Exception as e:
+            print(f"⚠️ Batch isteği hata verdi ({key[:12]}): {e}")
+            text = None
+        with self._lock:
+            if job["state"] != "running":
+                return
+            job["results"][key] = text
+            if len(job["results"]) >= job["total"]:
+                job["state"] = "succeeded"
+
+    def status(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return {"state": "failed", "done": 0, "total": 0}
+            return {"state": job["state"], "done": len(job["results"]), "total": job["total"]}
+
+    def results(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return {}
+            if job["state"] != "running":
+                # Biten işin sonuçları bir kez alınır, bellekte tutulmaz
+                del self._jobs[job_id]
+            return dict(job["results"])
+
+    def cancel(self, job_id):
+        """Bekleyen istekleri iptal eder; o ana kadar biten sonuçlar results ile alınabilir."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["state"] != "running":
+                return
+            job["state"] = "cancelled"
+            futures = list(job["futures"])
+        # Future.cancel callback'leri hemen çağırır; kilit dışında yapılır
+        for future in futures:
+            future.cancel()
+
+
+def _generate_call(request):
+    return lambda: llm_client.generate(request["prompt"], generation_config=request.get("generation_config"),
+                                       priority="batch")
+
+
+class HTTPBatchBackend:
+    def __init__(self, base_url=BATCH_URL):
+        self.base_url = base_url.rstrip("/")
+
+    def submit(self, batch_requests):
+        response = requests.post(f"{self.base_url}/batches", json={"requests": batch_requests}, timeout=60)
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def status(self, job_id):
+        response = requests.get(f"{self.base_url}/batches/{job_id}", timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    def results(self, job_id):
+        response = requests.get(f"{self.base_url}/batches/{job_id}/results", timeout=60)
+        response.raise_for_status()
+        return response.json().get("results", {})
+
+    def cancel(self, job_id):
+        response = requests.delete(f"{self.base_url}/batches/{job_id}", timeout=30)
+        response.raise_for_status()
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name=None):
+    name = name or BACKEND
+    with _backends_lock:
+        if name not in _backends:
+            if name == "http":
+                _backends[name] = HTTPBatchBackend(BATCH_URL)
+            else:
+                _backends[name] = LocalBatchBackend()
+        return _backends[name]
+
+
+def run_batch(batch_requests, backend=None, poll_interval=None, timeout=None, log=print):
+    """
+    batch_requests: [{"key": ..., "prompt": ..., "generation_config": ...}]
+    Dönen: {key: metin | None}. Süre dolarsa iş iptal edilir (bekleyen istekler için kota
+    harcanmaz, çağıran bunları ayrıca üretir) ve o ana kadar biten sonuçlar döner.
+    """
+    if not batch_requests:
+        return {}
+    backend = backend or get_backend()
+    poll_interval = POLL_INTERVAL if poll_interval is None else poll_interval
+    deadline = time.monotonic() + (BATCH_TIMEOUT if timeout is None else timeout)
+
+    job_id = backend.submit(batch_requests)
+    log(f"📦 Batch işi gönderildi: {len(batch_requests)} istek ({type(backend).__name__}, id={job_id[:8]})")
+
+    last_done = -1
+    while True:
+        status = backend.status(job_id)
+        if status.get("done") != last_done:
+            last_done = status.get("done")
+            log(f"   ⏳ Batch durumu: {status.get('state')} ({last_done}/{status.get('total')})")
+        if status.get("state") in ("succeeded", "failed", "cancelled"):
+            break
+        if time.monotonic() > deadline:
+            log("   ⚠️ Batch işi zaman aşımına uğradı, iptal ediliyor; biten sonuçlar kullanılacak.")
+            try:
+                backend.cancel(job_id)
+            except Exception as e:
+                log(f"   ⚠️ Batch işi iptal edilemedi: {e}")
+            break
+        time.sleep(poll_interval)
+
+    results = backend.results(job_id)
+    log(f"📦 Batch tamamlandı: {sum(1 for v in results.values() if v)}/{len(batch_requests)} başarılı.")
+    return results
+
+
+# ===================== STAND-IN SUNUCU =====================
+class BatchHandler(BaseHTTPRequestHandler):
+    backend = LocalBatchBackend()
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/batches":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length) or b"{}")
+            job_id = self.backend.submit(data.get("requests") or [])
+            self._send_json(200, {"id": job_id})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def do_GET(self):
+        parts = [p for p in self.path.split("/") if p]
+        if len(parts) == 2 and parts[0] == "batches":
+            self._send_json(200, self.backend.status(parts[1]))
+        elif len(parts) == 3 and parts[0] == "batches" and parts[2] == "results":
+            self._send_json(200, {"results": self.backend.results(parts[1])})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_DELETE(self):
+        parts = [p for p in self.path.split("/") if p]
+        if len(parts) == 2 and parts[0] == "batches":
+            self.backend.cancel(parts[1])
+            self._send_json(200, self.backend.status(parts[1]))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8766):
+    server = ThreadingHTTPServer((host, port), BatchHandler)
+    print(f"📦 Batch stand-in sunucusu hazır: http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🛑 Batch sunucusu kapatılıyor.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    serve(args.host, args.port)
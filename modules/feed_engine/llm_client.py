@@ -0,0 +1,404 @@
+# FILE: modules/feed_engine/llm_client.py
+# Gemini için uzun ömürlü istemci.
+# - genai.configure süreç başına bir kez çağrılır, GenerativeModel nesneleri saklanır.
+# - Her model için devre kesici (circuit breaker): art arda N hata -> devre açılır,
+#   bekleme süresi dolunca tek bir deneme isteği (half-open) geçer.
+# - İstekler doğrudan ilk sağlıklı modele gider; çökük model her özette tekrar denenmez.
+# - Hatalar sessizce yutulmaz, model bazında metrik olarak tutulur.
+# - Her deneme, süreçler arası rate_limiter kovasından öncelikle token alır.
+# - Opsiyonel hedging: birincil model gecikirse aynı istek sıradaki modele de gider.
+
+import os
+import time
+import threading
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from dotenv import load_dotenv
+import google.generativeai as genai
+
+from modules.feed_engine import rate_limiter
+from modules.feed_engine.throttle import service_slot
+
+load_dotenv()
+
+# Fallback zinciri: ilk sağlıklı model kullanılır
+DEFAULT_MODELS = [
+    'gemini-3-flash',         # Kullanıcının tercihi (RPM 5)
+    'gemini-2.5-flash',       # Güvenli Liman (RPM 5)
+    'gemini-1.5-flash'        # Son Çare
+]
+
+FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN", "120"))
+
+# Hedging: birincil model bu yüzdelikteki gecikmeyi aşarsa sıradaki model de denenir
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "20"))  # Yeterli örnek yokken
+HEDGE_MIN_SAMPLES = 10
+HEDGE_WORKERS = 8
+
+# Kullanıcı bekleyen isteklerde kota için en fazla bu kadar beklenir; batch süresiz bekler
+PRIORITY_TIMEOUTS = {"interactive": 60.0, "web": 60.0, "batch": None}
+
+# Metin isteklerinin eşzamanlılığını llm_scheduler yönetir (batch en fazla worker-1);
+# burada ikinci bir semafor, interactive isteği boş worker'a rağmen batch'in arkasında bekletirdi.
+UNSLOTTED_SERVICES = {"gemini"}
+
+_configured = False
+_configure_lock = threading.Lock()
+_models = {}
+_models_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """İstek bu modele gidebilir mi? Half-open durumda sadece tek deneme geçer."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def cancel_probe(self):
+        """allow() sonrası istek hiç gönderilmediyse half-open denemesini geri verir."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Dönen: devre bu hatayla açıldıysa True"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                was_open = self.state == self.OPEN
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return not was_open
+            return False
+
+
+_breakers = {}
+_metrics = {}
+_latencies = {}
+_hedge_stats = {"requests": 0, "fired": 0, "hedge_wins": 0, "primary_wins": 0, "skipped_quota": 0}
+_state_lock = threading.Lock()
+_executor = None
+
+
+def _breaker(model_name):
+    with _state_lock:
+        if model_name not in _breakers:
+            _breakers[model_name] = CircuitBreaker()
+            _metrics[model_name] = {
+                "calls": 0, "successes": 0, "failures": 0, "skipped": 0,
+                "total_latency": 0.0, "last_error": None,
+            }
+        return _breakers[model_name]
+
+
+def _record(model_name, **changes):
+    with _state_lock:
+        stats = _metrics[model_name]
+        for key, value in changes.items():
+            if key == "last_error":
+                stats[key] = value
+            else:
+                stats[key] += value
+
+
+def configure():
+    """API anahtarını bir kez ayarlar. Anahtar yoksa False."""
+    global _configured
+    if _configured:
+        return True
+    with _configure_lock:
+        if not _configured:
+            api_key = os.environ.get("GOOGLE_API_KEY")
+            if not api_key:
+                return False
+            genai.configure(api_key=api_key)
+            _configured = True
+    return True
+
+
+def get_model(model_name):
+    """Saklanan GenerativeModel nesnesini döndürür (yoksa oluşturur)."""
+    if not configure():
+        return None
+    with _models_lock:
+        if model_name not in _models:
+            _models[model_name] = genai.GenerativeModel(model_name)
+        return _models[model_name]
+
+
+class QuotaTimeoutError(Exception):
+    """Rate limiter kovasından süresi içinde token alınamadı."""
+
+
+def _call_model(model_name, prompt, generation_config, service, raw):
+    """
+    Tek modele tek deneme (token önceden alınmış olmalı).
+    Metrikleri ve devre kesiciyi günceller; hata durumunda exception fırlatır.
+    """
+    breaker = _breaker(model_name)
+    started = time.monotonic()
+    try:
+        model = get_model(model_name)
+        slot = nullcontext() if service in UNSLOTTED_SERVICES else service_slot(service)
+        with slot:
+            started = time.monotonic()  # Slot beklemesi gecikmeye sayılmasın
+            response = model.generate_content(prompt, generation_config=generation_config)
+        result = response if raw else response.text
+    except Exception as e:
+        _record(model_name, calls=1, failures=1, total_latency=time.monotonic() - started,
+                last_error=f"{type(e).__name__}: {e}"[:300])
+        if breaker.record_failure():
+            print(f"🔌 {model_name} devre dışı ({COOLDOWN_SECONDS:.0f} sn): {e}")
+        raise
+
+    latency = time.monotonic() - started
+    breaker.record_success()
+    _record(model_name, calls=1, successes=1, total_latency=latency)
+    with _state_lock:
+        _latencies.setdefault(model_name, deque(maxlen=200)).append(latency)
+    return result
+
+
+def _reserve(model_name, service, priority, quota_timeout):
+    """
+    Model için devre ve kota kontrolü.
+    Dönen: True (çağrı yapılabilir), False (devre açık, model atlanır)
+    Kota süresi dolarsa QuotaTimeoutError.
+    """
+    breaker = _breaker(model_name)
+    if not breaker.allow():
+        _record(model_name, skipped=1)
+        return False
+    if not rate_limiter.acquire(service, priority, timeout=quota_timeout):
+        breaker.cancel_probe()
+        raise QuotaTimeoutError(f"{service} ({priority})")
+    return True
+
+
+def generate(prompt, models=None, generation_config=None, service="gemini", raw=False,
+             priority="batch", hedge=None, quota_timeout=None, raise_on_quota=False):
+    """
+    Zincirdeki ilk sağlıklı modelle içerik üretir.
+    raw=True ise response nesnesi, değilse response.text döner.
+    priority: 'interactive' | 'web' | 'batch' (ortak kotada sıra önceliği)
+    hedge: True ise yavaş kalan modele paralel olarak bir sonraki model de denenir
+           (None -> LLM_HEDGE ayarı)
+    quota_timeout: kota için en fazla bekleme (saniye); None -> önceliğin varsayılanı
+    raise_on_quota: True ise kota beklemesi dolunca None yerine QuotaTimeoutError fırlatılır
+                    (çağıran başka bir yola geçebilsin, örn. ses için EdgeTTS)
+    Hiçbir model cevap veremezse None (hatalar metriklere yazılır).
+    """
+    if quota_timeout is None:
+        quota_timeout = PRIORITY_TIMEOUTS.get(priority)
+    if not configure():
+        print("❌ GOOGLE_API_KEY eksik.")
+        return None
+
+    chain = list(models or DEFAULT_MODELS)
+    if (HEDGE_ENABLED if hedge is None else hedge) and len(chain) > 1:
+        return _generate_hedged(chain, prompt, generation_config, service, raw, priority,
+                                quota_timeout, raise_on_quota)
+
+    last_error = None
+    for model_name in chain:
+        try:
+            if not _reserve(model_name, service, priority, quota_timeout):
+                continue
+            return _call_model(model_name, prompt, generation_config, service, raw)
+        except QuotaTimeoutError:
+            print(f"⏳ {service} kotası için bekleme süresi doldu ({priority}).")
+            if raise_on_quota:
+                raise
+            return None
+        except Exception as e:
+            last_error = e
+            continue
+
+    if last_error is not None:
+        print(f"❌ Tüm modeller başarısız oldu: {last_error}")
+    else:
+        print("❌ Sağlıklı model yok (tüm devreler açık).")
+    return None
+
+
+# ===================== HEDGING =====================
+def _hedge_executor():
+    global _executor
+    if _executor is None:
+        with _state_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+    return _executor
+
+
+def hedge_delay(model_name):
+    """
+    Modelin gözlenen gecikmelerinin HEDGE_PERCENTILE yüzdeliği.
+    Yeterli örnek yoksa HEDGE_DEFAULT_DELAY.
+    """
+    with _state_lock:
+        samples = sorted(_latencies.get(model_name, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_DELAY
+    index = min(len(samples) - 1, int(len(samples) * HEDGE_PERCENTILE / 100.0))
+    return samples[index]
+
+
+def _hedge_count(field):
+    with _state_lock:
+        _hedge_stats[field] += 1
+
+
+def _generate_hedged(chain, prompt, generation_config, service, raw, priority, quota_timeout, raise_on_quota):
+    """
+    Birincil model hedge_delay() içinde cevap vermezse aynı istek zincirdeki
+    bir sonraki modele de gönderilir; ilk başarılı cevap kullanılır.
+    Hedge isteği kota beklemez: kovada o an token yoksa hedge atlanır.
+    """
+    _hedge_count("requests")
+    executor = _hedge_executor()
+    pending = {}
+    state = {"index": 0, "primary": None, "started": 0.0, "hedged": False, "hedge_fired": False}
+    last_error = None
+
+    def launch(is_hedge):
+        while state["index"] < len(chain):
+            model_name = chain[state["index"]]
+            timeout = 0 if is_hedge else quota_timeout
+            try:
+                if not _reserve(model_name, service, priority, timeout):
+                    state["index"] += 1
+                    continue
+            except QuotaTimeoutError:
+                if is_hedge:
+                    _hedge_count("skipped_quota")
+                    return False
+                raise
+            state["index"] += 1
+            future = executor.submit(_call_model, model_name, prompt, generation_config, service, raw)
+            pending[future] = (model_name, is_hedge)
+            if is_hedge:
+                state["hedge_fired"] = True
+            else:
+                state["primary"] = model_name
+                state["started"] = time.monotonic()
+                state["hedged"] = False
+            return True
+        return False
+
+    try:
+        launch(False)
+    except QuotaTimeoutError:
+        print(f"⏳ {service} kotası için bekleme süresi doldu ({priority}).")
+        if raise_on_quota:
+            raise
+        return None
+
+    while pending:
+        timeout = None
+        can_hedge = not state["hedged"] and state["index"] < len(chain)
+        if can_hedge:
+            timeout = max(0.0, hedge_delay(state["primary"]) - (time.monotonic() - state["started"]))
+
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            # Birincil gecikti: bir sonraki modeli paralel dene
+            state["hedged"] = True
+            if launch(True):
+                _hedge_count("fired")
+                print(f"🪁 {state['primary']} yavaş kaldı, {chain[state['index'] - 1]} ile hedge edildi.")
+            continue
+
+        for future in done:
+            model_name, is_hedge = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                last_error = e
+                continue
+            if state["hedge_fired"]:
+                _hedge_count("hedge_wins" if is_hedge else "primary_wins")
+            # Kaybeden istek arka planda tamamlanır, sonucu yok sayılır
+            return result
+
+        if not pending:
+            # Hepsi hata verdi: zincirde sıradaki modele normal şekilde geç
+            try:
+                launch(False)
+            except QuotaTimeoutError:
+                print(f"⏳ {service} kotası için bekleme süresi doldu ({priority}).")
+                if raise_on_quota:
+                    raise
+                return None
+
+    if last_error is not None:
+        print(f"❌ Tüm modeller başarısız oldu: {last_error}")
+    else:
+        print("❌ Sağlıklı model yok (tüm devreler açık).")
+    return None
+
+
+def hedge_stats():
+    """Hedge oranı (hedge edilen / toplam) ve kazanma oranı (hedge'in önce döndüğü / hedge edilen)."""
+    with _state_lock:
+        stats = dict(_hedge_stats)
+    stats["hedge_rate"] = stats["fired"] / stats["requests"] if stats["requests"] else 0.0
+    decided = stats["hedge_wins"] + stats["primary_wins"]
+    stats["win_rate"] = stats["hedge_wins"] / decided if decided else 0.0
+    return stats
+
+
+def metrics():
+    """Model bazında çağrı/başarı/hata sayıları, ortalama gecikme ve devre durumu."""
+    with _state_lock:
+        snapshot = {}
+        for model_name, stats in _metrics.items():
+            entry = dict(stats)
+            entry["avg_latency"] = stats["total_latency"] / stats["calls"] if stats["calls"] else 0.0
+            entry["state"] = _breakers[model_name].state
+            snapshot[model_name] = entry
+        return snapshot
+
+
+def format_metrics():
+    lines = []
+    for model_name, m in metrics().items():
+        lines.append(
+            f"🤖 {model_name}: {m['successes']}/{m['calls']} başarılı, {m['failures']} hata, "
+            f"{m['skipped']} atlandı, ort. {m['avg_latency']:.1f} sn, "
+            f"hedge eşiği {hedge_delay(model_name):.1f} sn, devre: {m['state']}"
+        )
+    hedge = hedge_stats()
+    if hedge["requests"]:
+        lines.append(
+            f"🪁 Hedge: {hedge['fired']}/{hedge['requests']} istek (%{hedge['hedge_rate'] * 100:.0f}), "
+            f"hedge kazandı %{hedge['win_rate'] * 100:.0f}, kota yüzünden atlanan {hedge['skipped_quota']}"
+        )
+    return "\n".join(lines)
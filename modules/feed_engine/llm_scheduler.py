@@ -0,0 +1,226 @@
+# FILE: modules/feed_engine/llm_scheduler.py
+# Süreç içi öncelikli LLM zamanlayıcısı.
+# Sıra: interactive (Telegram soru-cevap) > web (kayıt) > batch (tarama özetleri)
+# - Her sınıfın kuyruğu sınırlıdır; dolu kuyruğa batch iş bekleyerek, diğerleri hata ile döner.
+# - Her isteğin bir son tarihi (deadline) vardır; başlamadan süresi dolan iş çalıştırılmaz.
+# - Bekleyen istekler Future.cancel() ile iptal edilebilir.
+# - batch işler en fazla (worker - 1) worker kullanır; gece taraması sürerken bile
+#   bir soru her zaman boş bir worker bulur.
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from modules.feed_engine import llm_client
+
+PRIORITY_ORDER = ["interactive", "web", "batch"]
+
+WORKERS = int(os.getenv("LLM_SCHEDULER_WORKERS", "3"))
+QUEUE_LIMITS = {"interactive": 32, "web": 32, "batch": 64}
+
+# Varsayılan son tarihler (saniye); None = süresiz
+DEFAULT_DEADLINES = {"interactive": 90.0, "web": 120.0, "batch": None}
+
+
+class SchedulerFullError(Exception):
+    """Öncelik sınıfının kuyruğu dolu."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """İstek çalıştırılmadan önce son tarihi geçti."""
+
+
+class _Request:
+    def __init__(self, priority, fn, deadline):
+        self.priority = priority
+        self.fn = fn
+        self.deadline = deadline
+        self.future = Future()
+        self.submitted = time.monotonic()
+
+
+class LLMScheduler:
+    def __init__(self, workers=WORKERS, queue_limits=None):
+        self.workers = max(1, workers)
+        self.queue_limits = dict(QUEUE_LIMITS, **(queue_limits or {}))
+        # Batch için en az bir worker boş bırakılır (tek worker varsa paylaşılır)
+        self.batch_limit = self.workers - 1 if self.workers > 1 else 1
+        self._queues = {name: deque() for name in PRIORITY_ORDER}
+        self._cond = threading.Condition()
+        self._running_batch = 0
+        self._threads = []
+        self._stats = {name: {"submitted": 0, "completed": 0, "failed": 0, "expired": 0,
+                              "cancelled": 0, "rejected": 0, "waits": deque(maxlen=200)}
+                       for name in PRIORITY_ORDER}
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"llm-scheduler-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn, priority="batch", deadline=None, block=None):
+        """
+        fn: argümansız çağrılabilir (örn. lambda: llm_client.generate(...))
+        deadline: saniye; None ise sınıfın varsayılanı
+        block: kuyruk doluysa beklensin mi (varsayılan: sadece batch için)
+        Dönen: concurrent.futures.Future
+        """
+        if priority not in self._queues:
+            priority = "batch"
+        if deadline is None:
+            deadline = DEFAULT_DEADLINES.get(priority)
+        if block is None:
+            block = priority == "batch"
+        request = _Request(priority, fn, time.monotonic() + deadline if deadline else None)
+
+        with self._cond:
+            self._ensure_started()
+            queue = self._queues[priority]
+            while len(queue) >= self.queue_limits[priority]:
+                if not block:
+                    self._stats[priority]["rejected"] += 1
+                    raise SchedulerFullError(f"{priority} kuyruğu dolu ({len(queue)})")
+                self._cond.wait()
+            queue.append(request)
+            self._stats[priority]["submitted"] += 1
+            self._cond.notify_all()
+        return request.future
+
+    def _next_request(self):
+        """Kilit altında çağrılır: en yüksek öncelikli, çalıştırılabilir isteği seçer."""
+        for priority in PRIORITY_ORDER:
+            queue = self._queues[priority]
+            if not queue:
+                continue
+            if priority == "batch" and self._running_batch >= self.batch_limit:
+                continue
+            return queue.popleft()
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                request = self._next_request()
+                while request is None:
+                    self._cond.wait()
+                    request = self._next_request()
+                if request.priority == "batch":
+                    self._running_batch += 1
+                # Kuyrukta yer açıldı: bekleyen submit'ler uyansın
+                self._cond.notify_all()
+
+            try:
+                self._execute(request)
+            finally:
+                if request.priority == "batch":
+                    with self._cond:
+                        self._running_batch -= 1
+                        self._cond.notify_all()
+
+    def _count(self, priority, field):
+        with self._cond:
+            self._stats[priority][field] += 1
+
+    def _execute(self, request):
+        if not request.future.set_running_or_notify_cancel():
+            self._count(request.priority, "cancelled")
+            return
+        if request.deadline is not None and time.monotonic() > request.deadline:
+            self._count(request.priority, "expired")
+            request.future.set_exception(DeadlineExceededError("İstek sırada beklerken süresi doldu."))
+            return
+
+        # Sayaçlar ve bekleme örnekleri stats() ile aynı kilit altında güncellenir
+        with self._cond:
+            self._stats[request.priority]["waits"].append(time.monotonic() - request.submitted)
+        try:
+            result = request.fn()
+        except Exception as e:
+            self._count(request.priority, "failed")
+            request.future.set_exception(e)
+            return
+        self._count(request.priority, "completed")
+        request.future.set_result(result)
+
+    def queue_depths(self):
+        with self._cond:
+            return {name: len(queue) for name, queue in self._queues.items()}
+
+    def stats(self):
+        """Sınıf bazında sayaçlar ve kuyrukta bekleme süresi (p50 / p95)."""
+        with self._cond:
+            snapshot = {}
+            for name, stats in self._stats.items():
+                waits = sorted(stats["waits"])
+                entry = {k: v for k, v in stats.items() if k != "waits"}
+                entry["wait_p50"] = waits[len(waits) // 2] if waits else 0.0
+                entry["wait_p95"] = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+                entry["queued"] = len(self._queues[name])
+                snapshot[name] = entry
+            return snapshot
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler()
+    return _scheduler
+
+
+def _generate_call(prompt, priority, generate_kwargs):
+    return lambda: llm_client.generate(prompt, priority=priority, **generate_kwargs)
+
+
+def generate(prompt, priority="batch", deadline=None, **generate_kwargs):
+    """
+    llm_client.generate'i zamanlayıcı üzerinden çalıştırır ve sonucu bekler.
+    Kuyruk doluysa veya süre dolarsa None döner (diğer hatalar gibi).
+    """
+    try:
+        future = get_scheduler().submit(_generate_call(prompt, priority, generate_kwargs),
+                                        priority=priority, deadline=deadline)
+    except SchedulerFullError as e:
+        print(f"⚠️ LLM kuyruğu dolu: {e}")
+        return None
+    timeout = deadline if deadline is not None else DEFAULT_DEADLINES.get(priority)
+    try:
+        return future.result(timeout=timeout)
+    except Exception as e:
+        future.cancel()
+        print(f"⚠️ LLM isteği tamamlanamadı ({priority}): {type(e).__name__}")
+        return None
+
+
+async def generate_async(prompt, priority="interactive", deadline=None, **generate_kwargs):
+    """
+    Asenkron handler'lar için: olay döngüsünü bloklamadan bekler.
+    Çağıran iptal edilirse (örn. bot kapanıyor) bekleyen istek de iptal edilir.
+    """
+    try:
+        future = get_scheduler().submit(_generate_call(prompt, priority, generate_kwargs),
+                                        priority=priority, deadline=deadline, block=False)
+    except SchedulerFullError as e:
+        print(f"⚠️ LLM kuyruğu dolu: {e}")
+        return None
+    timeout = deadline if deadline is not None else DEFAULT_DEADLINES.get(priority)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.cancel()
+        print(f"⚠️ LLM isteği tamamlanamadı ({priority}): {type(e).__name__}")
+        return None
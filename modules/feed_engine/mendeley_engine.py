@@ -3,6 +3,8 @@ from requests_oauthlib import OAuth2Session
 from oauthlib.oauth2 import TokenExpiredError
 from dotenv import load_dotenv
 
+from modules.feed_engine.throttle import service_slot
+
 load_dotenv()
 
 CLIENT_ID = os.getenv("MENDELEY_CLIENT_ID")
@@ -56,7 +58,8 @@ def add_paper_to_library(token_dict, title, url, abstract, user_id=None):
     client = OAuth2Session(CLIENT_ID, token=token_dict)
 
     try:
-        response = client.post('https://api.mendeley.com/documents', json=document, headers=headers)
+        with service_slot("mendeley"):
+            response = client.post('https://api.mendeley.com/documents', json=document, headers=headers)
 
         # Eğer Token Süresi Dolmuşsa (401 Hatası)
         if response.status_code == 401:
@@ -73,7 +76,8 @@ def add_paper_to_library(token_dict, title, url, abstract, user_id=None):
 
                 # İşlemi yeni token ile tekrar dene
                 client = OAuth2Session(CLIENT_ID, token=new_token)
-                response = client.post('https://api.mendeley.com/documents', json=document, headers=headers)
+                with service_slot("mendeley"):
+                    response = client.post('https://api.mendeley.com/documents', json=document, headers=headers)
 
             except Exception as e:
                 print(f"❌ Yenileme Başarısız: {e}")
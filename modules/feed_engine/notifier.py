@@ -2,6 +2,8 @@ import os
 import requests
 from dotenv import load_dotenv
 
+from modules.feed_engine.throttle import service_slot
+
 load_dotenv()
 
 
@@ -27,7 +29,8 @@ def send_chunk(chat_id, text, token):
     }
 
     try:
-        response = requests.post(url, json=payload)
+        with service_slot("telegram"):
+            response = requests.post(url, json=payload)
         if response.status_code == 200:
             print(f"✅ Mesaj parça olarak iletildi.")
             return response.json().get('result', {}).get('message_id')
@@ -40,7 +43,8 @@ def send_chunk(chat_id, text, token):
             # Basit temizlik yapıp gönder
             payload["text"] = text  # Veya clean_markdown(text)
 
-            response = requests.post(url, json=payload)
+            with service_slot("telegram"):
+                response = requests.post(url, json=payload)
             if response.status_code == 200:
                 print("✅ Düz metin olarak kurtarıldı ve iletildi.")
                 return response.json().get('result', {}).get('message_id')
@@ -91,7 +95,8 @@ def send_audio(filename, target_chat_id=None):
         with open(filename, 'rb') as audio_file:
             files = {'audio': audio_file}
             data = {'chat_id': chat_id, 'title': 'Makale Özeti (Yapay Zeka)'}
-            requests.post(url, data=data, files=files)
+            with service_slot("telegram"):
+                requests.post(url, data=data, files=files)
             print("✅ Ses dosyası gönderildi! 🎧")
     except Exception as e:
         print(f"❌ Ses hatası: {e}")
\ No newline at end of file
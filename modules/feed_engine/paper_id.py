@@ -0,0 +1,46 @@
+# FILE: modules/feed_engine/paper_id.py
+# Makale linklerini kanonik kimliğe çevirir.
+# Aynı makalenin farklı linkleri (abs/pdf, v1/v2, http/https) tek anahtara düşer.
+
+import re
+
+# http://arxiv.org/abs/2301.12345v2 , https://arxiv.org/pdf/2301.12345.pdf , arxiv.org/abs/hep-th/9901001
+ARXIV_PATTERN = re.compile(
+    r'arxiv\.org/(?:abs|pdf)/([a-z\-]+(?:\.[A-Z]{2})?/\d{7}|\d{4}\.\d{4,5})(?:v\d+)?(?:\.pdf)?',
+    re.IGNORECASE
+)
+DOI_PATTERN = re.compile(r'(?:doi\.org/|doi:\s*)(10\.\d{4,9}/[^\s?#]+)', re.IGNORECASE)
+
+
+def extract_arxiv_id(url):
+    """Linkten versiyonsuz ArXiv ID'sini çıkarır, yoksa None."""
+    if not url:
+        return None
+    match = ARXIV_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def canonical_paper_id(url):
+    """
+    Makale linkini kanonik kimliğe çevirir:
+        'arxiv:2301.12345', 'doi:10.1109/...', veya 'url:host/path'
+    """
+    if not url:
+        return ""
+
+    arxiv_id = extract_arxiv_id(url)
+    if arxiv_id:
+        return f"arxiv:{arxiv_id.lower()}"
+
+    doi = DOI_PATTERN.search(url)
+    if doi:
+        return f"doi:{doi.group(1).lower().rstrip('/')}"
+
+    # Genel link: şema, www, fragment ve sondaki / atılır
+    clean = url.strip().split("#")[0]
+    clean = re.sub(r'^[a-z]+://', '', clean, flags=re.IGNORECASE)
+    host, _, rest = clean.partition("/")
+    host = host.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"url:{host}/{rest}".rstrip("/")
@@ -0,0 +1,125 @@
+# FILE: modules/feed_engine/pdf_cache.py
+# PDF'ten çıkarılan metnin disk önbelleği.
+# Anahtar: kanonik makale kimliği (arxiv:..., doi:..., url:...) -> SHA-256 dosya adı
+# Değer: zlib ile sıkıştırılmış UTF-8 metin.
+# Aynı makale beş hocaya eşleşse de (veya tarama tekrar çalışsa da) PDF bir kez indirilip okunur.
+#
+# Süre (TTL) dosyanın yazılma zamanına (mtime), LRU ise son okunma zamanına (atime) göre işler.
+
+import os
+import time
+import zlib
+import hashlib
+import threading
+
+from modules.feed_engine.paper_id import canonical_paper_id
+
+CACHE_DIR = os.getenv("PDF_CACHE_DIR", "pdf_cache")
+MAX_BYTES = int(float(os.getenv("PDF_CACHE_MAX_MB", "500")) * 1024 * 1024)
+TTL_SECONDS = int(float(os.getenv("PDF_CACHE_TTL_DAYS", "30")) * 86400)
+
+_lock = threading.Lock()
+
+
+def _path(paper_id):
+    digest = hashlib.sha256(paper_id.encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.txt.z")
+
+
+def _is_expired(stat, now):
+    return TTL_SECONDS > 0 and now - stat.st_mtime > TTL_SECONDS
+
+
+def get_text(url):
+    """
+    Önbellekteki metni döndürür; yoksa veya süresi dolmuşsa None.
+    Ağ ya da PDF işlemi yapmaz.
+    """
+    paper_id = canonical_paper_id(url)
+    if not paper_id:
+        return None
+    path = _path(paper_id)
+    now = time.time()
+    try:
+        stat = os.stat(path)
+        if _is_expired(stat, now):
+            os.remove(path)
+            return None
+        with open(path, "rb") as f:
+            text = zlib.decompress(f.read()).decode("utf-8")
+        # LRU: son kullanım zamanını güncelle, yazılma zamanı (TTL) aynı kalsın
+        os.utime(path, (now, stat.st_mtime))
+        return text
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ PDF önbelleği okunamadı ({paper_id}): {e}")
+        return None
+
+
+def put_text(url, text):
+    """Metni sıkıştırıp atomik olarak yazar, ardından boyut sınırını uygular."""
+    paper_id = canonical_paper_id(url)
+    if not paper_id or not text:
+        return
+    path = _path(paper_id)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(text.encode("utf-8"), 6))
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ PDF önbelleğine yazılamadı ({paper_id}): {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    _evict()
+
+
+def _evict():
+    """Süresi dolanları siler; toplam boyut MAX_BYTES'ı aşarsa en az kullanılanları atar."""
+    now = time.time()
+    with _lock:
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(CACHE_DIR)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith(".txt.z"):
+                continue
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                stat = os.stat(path)
+                if _is_expired(stat, now):
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= MAX_BYTES:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+def stats():
+    count = 0
+    total = 0
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if name.endswith(".txt.z"):
+                count += 1
+                total += os.path.getsize(os.path.join(CACHE_DIR, name))
+    return {"entries": count, "bytes": total, "max_bytes": MAX_BYTES, "path": CACHE_DIR}
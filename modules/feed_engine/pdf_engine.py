@@ -1,42 +1,270 @@
 import requests
 import fitz  # PyMuPDF kütüphanesi
 import os
+import time
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlparse
+
+from modules.feed_engine import pdf_cache
+from modules.feed_engine.sections import parse_document
+from modules.feed_engine.paper_id import canonical_paper_id, extract_arxiv_id
+from modules.feed_engine.throttle import service_slot
+
+# Ek dosyalar gibi dev PDF'ler taramayı kilitlemesin
+MAX_PDF_BYTES = int(float(os.getenv("PDF_MAX_MB", "25")) * 1024 * 1024)
+DOWNLOAD_TIMEOUT = float(os.getenv("PDF_DOWNLOAD_TIMEOUT", "60"))
+PROBE_TIMEOUT = 10
+CHUNK_SIZE = 64 * 1024
+
+# Metin çıkarma sınırları: en fazla 15 sayfa, karakter bütçesi dolunca erken durur
+# (prompt_budget modülü bu metinden özete SUMMARY_CONTEXT_TOKENS bütçesine sığan cümleleri seçer)
+MAX_PAGES = 15
+CHAR_BUDGET = int(os.getenv("PDF_CHAR_BUDGET", "60000"))
+
+# PyMuPDF CPU'ya yüklenir; ayrı süreçlerde çalışsın ki bot/polling thread'i bloklanmasın.
+# 0 verilirse ayrıştırma bu süreçte yapılır.
+PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Bozuk bir PDF veya takılan fitz süreci taramayı kilitlemesin; süre dolarsa abstract kullanılır
+PARSE_TIMEOUT = float(os.getenv("PDF_PARSE_TIMEOUT", "60"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# PDF sunmayan, sadece tanıtım sayfası olan siteler (indirmeye hiç çalışılmaz)
+LANDING_PAGE_HOSTS = ("semanticscholar.org", "api.semanticscholar.org")
+
+# Aynı makale için paralel worker'lar tek indirme yapsın diye makale başına kilit.
+# Zayıf referanslı: son bekleyen bırakınca kilit silinir, uzun çalışan botta sözlük büyümez.
+_paper_locks = weakref.WeakValueDictionary()
+_paper_locks_guard = threading.Lock()
+
+
+def _paper_lock(url):
+    with _paper_locks_guard:
+        return _paper_locks.setdefault(canonical_paper_id(url), threading.Lock())
 
 
 def download_and_extract_text(arxiv_url):
     """
-    ArXiv linkinden PDF'i indirir ve içindeki metni çıkarır.
+    Makale linkinden (ArXiv veya açık erişim) PDF'i indirir ve içindeki metni çıkarır.
+    Çıkarılan metin pdf_cache'e yazılır; tekrar istenirse ağa gidilmez.
+    """
+    cached = pdf_cache.get_text(arxiv_url)
+    if cached is not None:
+        print(f"⚡ PDF önbellekten okundu ({len(cached)} karakter).")
+        return cached
+
+    with _paper_lock(arxiv_url):
+        # Kilidi beklerken başka bir worker aynı makaleyi okumuş olabilir
+        cached = pdf_cache.get_text(arxiv_url)
+        if cached is not None:
+            print(f"⚡ PDF önbellekten okundu ({len(cached)} karakter).")
+            return cached
+
+        text_content = _download_and_extract(arxiv_url)
+        if text_content:
+            pdf_cache.put_text(arxiv_url, text_content)
+        return text_content
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    return _executor
+
+
+def extract_text_from_pdf_bytes(content, max_pages=MAX_PAGES, char_budget=CHAR_BUDGET):
+    """
+    PDF'i sayfa sayfa okur; karakter bütçesi dolunca durur.
+    Süreç havuzunda çalıştığı için modül seviyesinde tanımlı (pickle edilebilir).
+    """
+    parts = []
+    total = 0
+    with fitz.open(stream=content, filetype="pdf") as pdf_document:
+        for i in range(min(len(pdf_document), max_pages)):
+            page_text = pdf_document.load_page(i).get_text()
+            parts.append(page_text)
+            total += len(page_text)
+            if char_budget and total >= char_budget:
+                break
+    return "".join(parts)
+
+
+def _replace_executor(pool, terminate=False):
+    """
+    Bozulan / takılan havuzu bırakır; sonraki ayrıştırmalar yeni havuza gider.
+    terminate: takılan süreçler PARSE_TIMEOUT sonra öldürülür (o arada biten işler kaybolmaz).
     """
-    print("📥 PDF İndiriliyor ve Okunuyor...")
+    global _executor
+    with _executor_lock:
+        if _executor is pool:
+            _executor = None
+    # shutdown süreç listesini sıfırlar; önce alınır
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    if terminate:
+        timer = threading.Timer(PARSE_TIMEOUT, lambda: [p.terminate() for p in processes if p.is_alive()])
+        timer.daemon = True
+        timer.start()
 
-    # 1. URL Dönüşümü (Abstract linkini PDF linkine çevir)
-    # Örn: http://arxiv.org/abs/2301.12345 -> http://arxiv.org/pdf/2301.12345.pdf
-    pdf_url = arxiv_url.replace("abs", "pdf") + ".pdf"
 
+def parse_pdf(content):
+    """
+    Ayrıştırmayı süreç havuzuna verir.
+    Süre dolarsa veya havuz çökerse None (çağıran abstract'a düşer) ve havuz yenilenir.
+    """
+    if PARSE_WORKERS <= 0:
+        return extract_text_from_pdf_bytes(content, MAX_PAGES, CHAR_BUDGET)
+    pool = _get_executor()
     try:
-        # 2. PDF'i İndir
-        response = requests.get(pdf_url)
-        if response.status_code != 200:
-            print("❌ PDF indirilemedi.")
-            return None
+        return pool.submit(extract_text_from_pdf_bytes, content, MAX_PAGES, CHAR_BUDGET).result(timeout=PARSE_TIMEOUT)
+    except FutureTimeoutError:
+        print(f"⏳ PDF ayrıştırma {PARSE_TIMEOUT:.0f} sn içinde bitmedi, havuz yenileniyor.")
+        _replace_executor(pool, terminate=True)
+        return None
+    except BrokenProcessPool:
+        print("⚠️ PDF süreç havuzu çöktü, yeniden başlatılıyor.")
+        _replace_executor(pool)
+        return None
 
-        # 3. PDF'i Bellekte Aç (Diske kaydetmeye gerek yok)
-        pdf_document = fitz.open(stream=response.content, filetype="pdf")
 
-        text_content = ""
+def download_and_extract_document(paper_url):
+    """
+    download_and_extract_text + bölümleme.
+    Dönen: sections.parse_document çıktısı (kaynakça/ekler ayrılmış) ya da None
+    """
+    text_content = download_and_extract_text(paper_url)
+    if not text_content:
+        return None
+    document = parse_document(text_content)
+    kept = sum(s["end"] - s["start"] for s in document["sections"])
+    print(f"📑 {len(document['sections'])} bölüm bulundu "
+          f"({len(text_content) - kept} karakter kaynakça/ek/başlık atıldı).")
+    return document
 
-        # 4. Sayfaları Oku
-        # Gemini kotasını korumak için genelde ilk 10-15 sayfa (Intro, Method, Results) yeterlidir.
-        page_count = len(pdf_document)
-        read_limit = min(page_count, 15)
 
-        for i in range(read_limit):
-            page = pdf_document.load_page(i)
-            text_content += page.get_text()
+def resolve_pdf_url(url):
+    """
+    Makale linkini kaynağına göre indirme stratejisine çevirir.
+    Dönen: (pdf_url, strateji)
+        'arxiv'   -> ArXiv ID'sinden üretilen PDF linki
+        'direct'  -> Zaten .pdf ile biten açık erişim linki (olduğu gibi)
+        'probe'   -> Bilinmeyen sayfa, indirmeden önce HEAD ile içerik türü kontrol edilir
+        (None, 'landing') -> PDF olmayan tanıtım sayfası, indirme denenmez
+    """
+    if not url:
+        return None, "landing"
+
+    arxiv_id = extract_arxiv_id(url)
+    if arxiv_id:
+        # Örn: http://arxiv.org/abs/2301.12345v2 -> https://arxiv.org/pdf/2301.12345
+        return f"https://arxiv.org/pdf/{arxiv_id}", "arxiv"
+
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    if parsed.path.lower().endswith(".pdf"):
+        return url, "direct"
+    if host in LANDING_PAGE_HOSTS:
+        return None, "landing"
+    return url, "probe"
+
+
+def _probe_is_pdf(pdf_url):
+    """
+    HEAD isteği ile içerik türüne bakar.
+    Dönen: True (PDF), False (PDF değil) veya None (sunucu HEAD'e cevap vermedi)
+    """
+    try:
+        with service_slot("pdf"):
+            response = requests.head(pdf_url, allow_redirects=True, timeout=PROBE_TIMEOUT)
+    except requests.RequestException:
+        return None
+    if response.status_code >= 400:
+        # Bazı sunucular HEAD desteklemez; karar GET'e kalır
+        return None if response.status_code in (403, 405, 501) else False
+    content_type = response.headers.get("Content-Type", "").lower()
+    if "pdf" in content_type or "octet-stream" in content_type:
+        return True
+    return False if content_type else None
+
+
+def _fetch_pdf_bytes(pdf_url):
+    """
+    PDF'i parça parça indirir; MAX_PDF_BYTES veya DOWNLOAD_TIMEOUT aşılırsa vazgeçer.
+    Dönen: bytes ya da None
+    """
+    started = time.monotonic()
+    with service_slot("pdf"):
+        with requests.get(pdf_url, stream=True, timeout=(PROBE_TIMEOUT, 30)) as response:
+            if response.status_code != 200:
+                print(f"❌ PDF indirilemedi (HTTP {response.status_code}).")
+                return None
+
+            content_type = response.headers.get("Content-Type", "").lower()
+            if "html" in content_type:
+                print("❌ Link PDF değil, HTML sayfası döndü.")
+                return None
+
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > MAX_PDF_BYTES:
+                print(f"⚠️ PDF çok büyük ({int(declared) // (1024 * 1024)} MB), atlanıyor.")
+                return None
+
+            chunks = []
+            total = 0
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                total += len(chunk)
+                if total > MAX_PDF_BYTES:
+                    print(f"⚠️ PDF {MAX_PDF_BYTES // (1024 * 1024)} MB sınırını aştı, atlanıyor.")
+                    return None
+                if time.monotonic() - started > DOWNLOAD_TIMEOUT:
+                    print(f"⚠️ PDF indirmesi {DOWNLOAD_TIMEOUT:.0f} sn'yi aştı, atlanıyor.")
+                    return None
+                chunks.append(chunk)
+
+    data = b"".join(chunks)
+    if not data.startswith(b"%PDF"):
+        print("❌ İndirilen dosya PDF değil.")
+        return None
+    return data
+
+
+def _download_and_extract(paper_url):
+    pdf_url, strategy = resolve_pdf_url(paper_url)
+    if not pdf_url:
+        print("ℹ️ Bu kaynak için PDF linki yok, özet kullanılacak.")
+        return None
+
+    if strategy == "probe" and _probe_is_pdf(pdf_url) is False:
+        print("ℹ️ Link bir PDF'e gitmiyor, özet kullanılacak.")
+        return None
+
+    print(f"📥 PDF İndiriliyor ve Okunuyor ({strategy})...")
+
+    try:
+        # 2. PDF'i İndir (boyut ve süre sınırlı)
+        content = _fetch_pdf_bytes(pdf_url)
+        if not content:
+            return None
+
+        # 3. PDF'i ayrı süreçte aç ve oku
+        # Gemini kotasını korumak için genelde ilk 10-15 sayfa (Intro, Method, Results) yeterlidir.
+        text_content = parse_pdf(content)
+        if not text_content:
+            return None
 
         print(f"✅ PDF Okundu ({len(text_content)} karakter).")
         return text_content
 
     except Exception as e:
         print(f"❌ PDF Hatası: {e}")
-        return None
\ No newline at end of file
+        return None
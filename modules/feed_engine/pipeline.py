@@ -0,0 +1,128 @@
+# FILE: modules/feed_engine/pipeline.py
+# Aşamalı asyncio iş hattı (pipeline) motoru.
+# Aşamalar sınırlı kuyruklarla birbirine bağlanır; böylece A kullanıcısının özeti
+# hazırlanırken B'nin PDF'i inebilir, C'nin sesi üretilebilir.
+
+import time
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Stage:
+    """
+    Tek bir iş hattı aşaması.
+    fn(job) -> job (sonraki aşamaya geçer) veya None (iş burada biter).
+    fn senkron ise thread havuzunda, async ise doğrudan event loop'ta çalışır.
+    """
+
+    def __init__(self, name, fn, workers=1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.busy_seconds = 0.0
+
+    async def process(self, job, executor):
+        started = time.monotonic()
+        try:
+            if inspect.iscoroutinefunction(self.fn):
+                return await self.fn(job)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, self.fn, job)
+        finally:
+            self.busy_seconds += time.monotonic() - started
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "busy_seconds": round(self.busy_seconds, 1),
+        }
+
+
+class Pipeline:
+    """
+    Kullanım:
+        pipeline = Pipeline([
+            Stage("pdf", stage_pdf, workers=4),
+            Stage("summarize", stage_summarize, workers=2),
+            Stage("deliver", deliver, workers=2),
+        ])
+        pipeline.run_sync(jobs)
+    """
+
+    def __init__(self, stages, queue_size=8, report_interval=15, log=print):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.log = log
+        self._queues = []
+
+    def queue_depths(self):
+        """Her aşamanın girişinde bekleyen iş sayısı."""
+        return {stage.name: q.qsize() for stage, q in zip(self.stages, self._queues)}
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    async def _worker(self, stage, in_queue, out_queue, executor):
+        while True:
+            job = await in_queue.get()
+            try:
+                result = await stage.process(job, executor)
+                stage.processed += 1
+                if result is None:
+                    stage.dropped += 1
+                elif out_queue is not None:
+                    await out_queue.put(result)
+            except Exception as e:
+                stage.failed += 1
+                self.log(f"❌ [{stage.name}] aşaması hata verdi: {e}")
+            finally:
+                in_queue.task_done()
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            depths = " ".join(f"{name}={depth}" for name, depth in self.queue_depths().items())
+            self.log(f"📊 Kuyruklar: {depths}")
+
+    async def run(self, jobs):
+        # Kuyruklar çalışan loop içinde oluşturulmalı
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        total_workers = sum(stage.workers for stage in self.stages)
+        executor = ThreadPoolExecutor(max_workers=total_workers, thread_name_prefix="pipeline")
+
+        tasks = []
+        for i, stage in enumerate(self.stages):
+            out_queue = self._queues[i + 1] if i + 1 < len(self.stages) else None
+            for _ in range(stage.workers):
+                tasks.append(asyncio.create_task(self._worker(stage, self._queues[i], out_queue, executor)))
+        monitor = asyncio.create_task(self._monitor())
+
+        try:
+            for job in jobs:
+                # Kuyruk doluysa bekler (backpressure)
+                await self._queues[0].put(job)
+            # Bir iş i. kuyruktan çıkmadan önce (i+1). kuyruğa konduğu için sırayla beklemek yeterli
+            for queue in self._queues:
+                await queue.join()
+        finally:
+            for task in tasks + [monitor]:
+                task.cancel()
+            await asyncio.gather(*tasks, monitor, return_exceptions=True)
+            executor.shutdown(wait=False)
+
+        for name, s in self.stats().items():
+            self.log(f"   📈 {name}: {s['processed']} iş, {s['failed']} hata, "
+                     f"{s['dropped']} elendi, {s['busy_seconds']} sn ({s['workers']} worker)")
+        return self.stats()
+
+    def run_sync(self, jobs):
+        """Senkron kod ve arka plan thread'lerinden çağırmak için."""
+        return asyncio.run(self.run(jobs))
@@ -1,44 +1,130 @@
 import os
+import json
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from modules.feed_engine import extractive, llm_batch, llm_client, llm_scheduler, summary_cache
+from modules.feed_engine.paper_id import canonical_paper_id
+from modules.feed_engine.prompt_budget import summary_context
 
 load_dotenv()
 MODEL_NAME = 'gemini-2.5-flash'
 
+# Kullanıcı bekleyen istekler MODEL_NAME ile başlar, zincirin geri kalanı yedektir;
+# zincir birden uzun olduğu için LLM_HEDGE açıkken bu istekler de hedge edilir.
+INTERACTIVE_MODELS = [MODEL_NAME] + [m for m in llm_client.DEFAULT_MODELS if m != MODEL_NAME]
+
+# Özet önbelleği anahtarının parçası: prompt veya bağlam seçimi değişince artırın,
+# eski sürümle üretilmiş özetler bir daha kullanılmaz.
+SUMMARY_PROMPT_VERSION = "3"
+
+# Çoklu varyant modunda tek çağrıda istenecek en fazla özet sayısı (çıktı uzunluğu sınırı)
+MAX_VARIANTS_PER_CALL = int(os.getenv("SUMMARY_MAX_VARIANTS_PER_CALL", "4"))
+
+# Çoklu sürüm çağrıları JSON cevap ister
+VARIANTS_CONFIG = {"response_mime_type": "application/json"}
+
+FAILED_SUMMARY = "Hocam, makale analizinde teknik bir sorun oluştu ancak başlık ilginizi çekebilir."
+
+# "kisa" özetler için ilk geçiş: llm (varsayılan) | extractive (yerel, kota harcamaz)
+KISA_MODE = os.getenv("SUMMARY_KISA_MODE", "llm")
+
 
 def get_model():
-    api_key = os.environ.get("GOOGLE_API_KEY")
-    if not api_key: return None
-    genai.configure(api_key=api_key)
-    return genai.GenerativeModel(MODEL_NAME)
+    # genai.configure ve model nesnesi süreç başına bir kez oluşturulur
+    return llm_client.get_model(MODEL_NAME)
+
 
+def summarize_paper(paper_data, full_text=None, style="samimi", detail_level="orta", document=None):
+    """
+    Özet önbelleğine bakar; yoksa Gemini ile üretip kaydeder.
+    Aynı (makale, stil, detay) için paralel çağrılar tek bir model çağrısını paylaşır.
+    Model zinciri tamamen başarısız olursa yerel çıkarımsal özet döner.
+    """
+    if _use_extractive(detail_level):
+        return _extractive_summary(paper_data, full_text, document, style, detail_level)
+
+    paper_id = canonical_paper_id(paper_data.get('url'))
+    cached = summary_cache.get(paper_id, style, detail_level, SUMMARY_PROMPT_VERSION)
+    if cached is not None:
+        print(f"⚡ Özet önbellekten ({style}/{detail_level}).")
+        return cached
 
-def summarize_paper(paper_data, full_text=None, style="samimi", detail_level="orta"):
     model = get_model()
-    if not model: return "Hata: Model yüklenemedi."
+    if not model:
+        return _extractive_summary(paper_data, full_text, document, style, detail_level)
 
-    content = full_text if full_text else paper_data['abstract']
+    def generate():
+        content = _summary_content(paper_data, full_text, document)
+        return _generate_summary(paper_data, content, style, detail_level)
 
-    # --- 1. STİL AYARI (TONLAMA) ---
+    summary, from_cache = summary_cache.get_or_create(
+        paper_id, style, detail_level, SUMMARY_PROMPT_VERSION, generate
+    )
+    if from_cache:
+        print(f"⚡ Özet başka bir worker tarafından üretildi ({style}/{detail_level}).")
+    if not summary:
+        # Tüm modeller başarısız: yerel özet (önbelleğe yazılmaz, sonraki taramada model tekrar denenir)
+        print(f"🧾 Modeller cevap vermedi, yerel özet kullanılıyor ({style}/{detail_level}).")
+        return _extractive_summary(paper_data, full_text, document, style, detail_level)
+    return summary
+
+
+def _use_extractive(detail_level):
+    return detail_level == "kisa" and KISA_MODE == "extractive"
+
+
+def _extractive_summary(paper_data, full_text, document, style, detail_level):
+    """Deterministik, CPU'da çalışan çıkarımsal özet; hiç cümle çıkmazsa FAILED_SUMMARY."""
+    return extractive.summarize(paper_data, full_text=full_text, document=document,
+                                style=style, detail_level=detail_level) or FAILED_SUMMARY
+
+
+def _summary_content(paper_data, full_text=None, document=None):
+    """Özete girecek bağlam: bölümlenmiş belge > tam metin > özet (abstract)."""
+    # document: pdf_engine.download_and_extract_document çıktısı (varsa yeniden bölümlenmez)
+    # Bağlam SUMMARY_CONTEXT_TOKENS bütçesine en değerli cümlelerle doldurulur
+    if document or full_text:
+        return summary_context(document=document, text=full_text) or paper_data['abstract']
+    return paper_data['abstract']
+
+
+def _tone_description(style):
     # --- 1. STİL AYARI (TONLAMA) ---
     if style == "resmi":
-        tone_desc = "TON: Bir Fakülte Toplantısında sunum yapan akademisyen gibi. Ciddi, saygılı, kurumsal. 'Hocam' hitabı resmiyet içermeli. Şaka veya laubali ifadeler yasak."
+        return "TON: Bir Fakülte Toplantısında sunum yapan akademisyen gibi. Ciddi, saygılı, kurumsal. 'Hocam' hitabı resmiyet içermeli. Şaka veya laubali ifadeler yasak."
     elif style == "orta":
         # YENİ SEÇENEK: NORMAL HAYAT
-        tone_desc = "TON: İdeal bir ofis sohbeti. Ne çok kasıntı ne de çok gevşek. Saygılı ama samimi bir asistan gibi. Akıcı, anlaşılır, net bir İstanbul Türkçesi."
+        return "TON: İdeal bir ofis sohbeti. Ne çok kasıntı ne de çok gevşek. Saygılı ama samimi bir asistan gibi. Akıcı, anlaşılır, net bir İstanbul Türkçesi."
     elif style == "dogal":
-         tone_desc = "TON: Arkadaşça bir sohbet. Bir kafede kahve içerken anlatır gibi. 'Bak hocam şöyle bir şey çıkmış' dermişçesine doğal, duraksamalı, düşünme sesleri (hmm, yani vb.) içerebilen ultra-doğal yapı."
+        return "TON: Arkadaşça bir sohbet. Bir kafede kahve içerken anlatır gibi. 'Bak hocam şöyle bir şey çıkmış' dermişçesine doğal, duraksamalı, düşünme sesleri (hmm, yani vb.) içerebilen ultra-doğal yapı."
     else:  # samimi (varsayılan)
-        tone_desc = "TON: Heyecanlı bir Teknoloji YouTuber'ı veya Podcast sunucusu gibi. Enerjik, vurgulu, dinleyeni uyandıran, ilham verici bir üslup."
+        return "TON: Heyecanlı bir Teknoloji YouTuber'ı veya Podcast sunucusu gibi. Enerjik, vurgulu, dinleyeni uyandıran, ilham verici bir üslup."
 
-    # --- 2. DETAY AYARI (İÇERİK) ---
+
+def _content_description(detail_level):
     # --- 2. DETAY AYARI (İÇERİK) ---
     if detail_level == "detayli":
-        content_desc = "İÇERİK: BU BİR DERİNLEMESİNE TEKNİK ANALİZDİR. Makalenin sadece ne yaptığını değil, NASIL yaptığını anlat. Metodolojiyi, kullanılan algoritmaları, veri setlerini ve özellikle SAYISAL SONUÇLARI (Accuracy, F1 Score, vb.) madde madde konuşma diline yedirerek ver. Hocanın 'Bu makale teknik olarak ne katıyor?' sorusuna eksiksiz cevap ver."
+        return "İÇERİK: BU BİR DERİNLEMESİNE TEKNİK ANALİZDİR. Makalenin sadece ne yaptığını değil, NASIL yaptığını anlat. Metodolojiyi, kullanılan algoritmaları, veri setlerini ve özellikle SAYISAL SONUÇLARI (Accuracy, F1 Score, vb.) madde madde konuşma diline yedirerek ver. Hocanın 'Bu makale teknik olarak ne katıyor?' sorusuna eksiksiz cevap ver."
     elif detail_level == "kisa":
-        content_desc = "İÇERİK: ASANSÖR KONUŞMASI (ELEVATOR PITCH). Vaktimiz yok. Sadece en çarpıcı 'Yenilik Nedir?' ve 'Sonuç Nedir?' bilgisini ver. Gereksiz giriş-gelişme yapma. 30-45 saniyede bitecek şekilde nokta atışı yap."
+        return "İÇERİK: ASANSÖR KONUŞMASI (ELEVATOR PITCH). Vaktimiz yok. Sadece en çarpıcı 'Yenilik Nedir?' ve 'Sonuç Nedir?' bilgisini ver. Gereksiz giriş-gelişme yapma. 30-45 saniyede bitecek şekilde nokta atışı yap."
     else:  # orta / ana_mantik
-        content_desc = "İÇERİK: DENGELİ ÖZET. Problemi tanımla, önerilen çözümün ana fikrini (core idea) anlat ve en önemli 1-2 bulguyu paylaş. Teknik terimleri kullanmaktan çekinme ama boğucu olma. Ortalama 2-3 dakikalık bir radyo haberi kıvamında olsun."
+        return "İÇERİK: DENGELİ ÖZET. Problemi tanımla, önerilen çözümün ana fikrini (core idea) anlat ve en önemli 1-2 bulguyu paylaş. Teknik terimleri kullanmaktan çekinme ama boğucu olma. Ortalama 2-3 dakikalık bir radyo haberi kıvamında olsun."
+
+
+def _generate_with_fallback(prompt, generation_config=None):
+    """Zincirdeki ilk sağlıklı modelle üretir (llm_client.DEFAULT_MODELS); hepsi başarısızsa None."""
+    # Tarama özetleri en düşük öncelikte; soru-cevap istekleri önce çalışır
+    return llm_scheduler.generate(prompt, priority="batch", generation_config=generation_config)
+
+
+def _generate_summary(paper_data, content, style, detail_level):
+    """Prompt'u kurar ve model zincirini dener. Hepsi başarısızsa None."""
+    return _generate_with_fallback(_build_summary_prompt(paper_data, content, style, detail_level))
+
+
+def _build_summary_prompt(paper_data, content, style, detail_level):
+    tone_desc = _tone_description(style)
+    content_desc = _content_description(detail_level)
 
     # --- ANA PROMPT ---
     prompt = f"""
@@ -55,41 +141,215 @@ def summarize_paper(paper_data, full_text=None, style="samimi", detail_level="or
 
     MAKALE BİLGİSİ:
     Başlık: {paper_data['title']}
-    İçerik: {content[:60000]} 
+    İçerik: {content} 
 
     ÇIKTI:
     (Sadece konuşma metnini yaz. Başlık veya madde işareti koyma.)
     """
+    return prompt
+
 
-    # --- MODEL DENEME ZİNCİRİ (FALLBACK MECHANISM) ---
-    # Screenshot analizine göre 2.5 Pro yok, 2.5 Flash var (Limit: 5 RPM)
-    # 3.0 Flash da listede var, onu da deneyebiliriz.
-    models_to_try = [
-        'gemini-3-flash',         # Kullanıcının tercihi (RPM 5)
-        'gemini-2.5-flash',       # Güvenli Liman (RPM 5)
-        'gemini-1.5-flash'        # Son Çare
-    ]
-    
-    for current_model_name in models_to_try:
+# ===================== ÇOKLU VARYANT =====================
+def _parse_variants_json(text, variant_ids):
+    """Model çıktısındaki JSON'dan {varyant_id: metin} çıkarır; bozuk çıktıda boş sözlük."""
+    if not text:
+        return {}
+    clean = text.strip()
+    if clean.startswith("```"):
+        clean = clean.strip("`")
+        clean = clean[clean.find("{"):] if "{" in clean else clean
+    try:
+        data = json.loads(clean)
+    except ValueError:
+        start, end = clean.find("{"), clean.rfind("}")
+        if start < 0 or end <= start:
+            return {}
         try:
-            # print(f"🧠 Model deneniyor: {current_model_name}") 
-            active_model = genai.GenerativeModel(current_model_name)
-            response = active_model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            # print(f"⚠️ {current_model_name} hata verdi: {e}")
-            continue # Bir sonraki modele geç
-    
-    # Hiçbiri çalışmazsa
-    # print("❌ Tüm modeller başarısız oldu.")
-    return "Hocam, makale analizinde teknik bir sorun oluştu ancak başlık ilginizi çekebilir."
-
-
-def suggest_arxiv_categories(keywords):
-    model = get_model()
-    if not model: return "eess.SP"
+            data = json.loads(clean[start:end + 1])
+        except ValueError:
+            return {}
+    if isinstance(data, dict) and isinstance(data.get("variants"), list):
+        data = {item.get("id"): item.get("text") for item in data["variants"] if isinstance(item, dict)}
+    if not isinstance(data, dict):
+        return {}
+    return {vid: data[vid].strip() for vid in variant_ids
+            if isinstance(data.get(vid), str) and data[vid].strip()}
+
+
+def _build_variants_prompt(paper_data, content, variants):
+    """
+    Tek bağlam yüklemesiyle birden fazla (stil, detay) özeti isteyen prompt.
+    Dönen: (prompt, {varyant_id: (stil, detay)})
+    """
+    ids = {f"v{i + 1}": variant for i, variant in enumerate(variants)}
+    variant_lines = "\n".join(
+        f'    - "{vid}": {_tone_description(style)} {_content_description(detail)}'
+        for vid, (style, detail) in ids.items()
+    )
+    example = ", ".join(f'"{vid}": "..."' for vid in ids)
+
+    prompt = f"""
+    GÖREV: Sen ODTÜ'lü bir profesörün akıllı asistanısın. Aynı makalenin sözlü sunumunu
+    farklı hocalar için farklı üsluplarda hazırlıyorsun. Her sürüm birbirinden bağımsızdır.
+
+    HEDEF: Metinler sesli okunacak (TTS).
+
+    SÜRÜMLER:
+{variant_lines}
+
+    KURALLAR (her sürüm için):
+    1. GİRİŞ: Sadece selam ver ve konuya gir. (Örn: "Hocam merhaba, yeni bir çalışma var...")
+    2. OKUNABİLİRLİK: Formül, denklem veya parantez içi atıf (Author, 2023) ASLA okuma. Bunlar sesli anlaşılmaz.
+    3. AKICILIK: Metni tamamen konuşma diline dök. Başlık veya madde işareti koyma.
+
+    MAKALE BİLGİSİ:
+    Başlık: {paper_data['title']}
+    İçerik: {content}
+
+    ÇIKTI: Sadece geçerli JSON döndür: {{{example}}}
+    """
+    return prompt, ids
+
+
+def _store_variants(paper_id, ids, text):
+    """
+    Çoklu sürüm cevabını ayrıştırır, gelen özetleri önbelleğe yazar.
+    Dönen: {(stil, detay): özet}  (modelin üretemedikleri eksik kalır)
+    """
+    stored = {}
+    for vid, summary in _parse_variants_json(text, list(ids)).items():
+        style, detail = ids[vid]
+        summary_cache.put(paper_id, style, detail, SUMMARY_PROMPT_VERSION, summary)
+        stored[(style, detail)] = summary
+    return stored
+
+
+def _generate_variants(paper_data, paper_id, content, variants):
+    """Tek çağrıda birden fazla (stil, detay) özeti üretip önbelleğe yazar. Dönen: {(stil, detay): özet}"""
+    prompt, ids = _build_variants_prompt(paper_data, content, variants)
+    return _store_variants(paper_id, ids, _generate_with_fallback(prompt, generation_config=VARIANTS_CONFIG))
+
+
+def summarize_paper_variants(paper_data, variants, full_text=None, document=None):
+    """
+    Bir makale için gereken tüm (stil, detay) özetlerini üretir ve önbelleğe yazar.
+    Önbellekte olmayan sürümler tek bir JSON cevaplı çağrıda istenir (en fazla
+    MAX_VARIANTS_PER_CALL'lık gruplar halinde); eksik gelenler tek tek üretilir.
+    Dönen: {(stil, detay): özet}
+    """
+    paper_id = canonical_paper_id(paper_data.get('url'))
+    variants = list(dict.fromkeys(variants))
+    results = {}
+    missing = []
+    for style, detail in variants:
+        cached = summary_cache.get(paper_id, style, detail, SUMMARY_PROMPT_VERSION)
+        if cached is not None:
+            results[(style, detail)] = cached
+        elif not _use_extractive(detail):
+            missing.append((style, detail))
+
+    if len(missing) > 1 and get_model():
+        content = _summary_content(paper_data, full_text, document)
+
+        for i in range(0, len(missing), MAX_VARIANTS_PER_CALL):
+            batch = missing[i:i + MAX_VARIANTS_PER_CALL]
+            print(f"🧬 {len(batch)} özet sürümü tek çağrıda üretiliyor: {paper_data['title'][:40]}...")
+            results.update(_generate_variants(paper_data, paper_id, content, batch))
+
+    # Tek sürüm veya JSON'da eksik gelenler: normal yol
+    for style, detail in variants:
+        if (style, detail) not in results:
+            results[(style, detail)] = summarize_paper(paper_data, full_text=full_text, style=style,
+                                                       detail_level=detail, document=document)
+    return results
+
+
+# ===================== BATCH =====================
+def summarize_papers_batch(items, log=print):
+    """
+    Taramadaki tüm özet isteklerini tek bir batch işi olarak gönderir.
+    items: [{"paper", "full_text", "document", "style", "detail"}, ...]
+    Dönen: {(makale_id, stil, detay): özet}
+
+    Önbellekte olanlar gönderilmez; istekler makale bazında gruplanır. Birden fazla sürüm
+    gereken makale için, akış modundaki gibi tek bir çoklu sürüm isteği gider.
+    Batch'te başarısız olan veya eksik gelen sürümler summarize_paper_variants ile üretilir.
+    """
+    results = {}
+    papers = {}  # makale_id -> {"item": makalenin ilk işi, "variants": [(stil, detay), ...]}
+    for item in items:
+        paper_id = canonical_paper_id(item["paper"].get('url'))
+        key = (paper_id, item["style"], item["detail"])
+        if key in results:
+            continue
+        if _use_extractive(item["detail"]):
+            results[key] = _extractive_summary(item["paper"], item.get("full_text"), item.get("document"),
+                                               item["style"], item["detail"])
+            continue
+        cached = summary_cache.get(paper_id, item["style"], item["detail"], SUMMARY_PROMPT_VERSION)
+        if cached is not None:
+            results[key] = cached
+            continue
+        entry = papers.setdefault(paper_id, {"item": item, "variants": []})
+        if (item["style"], item["detail"]) not in entry["variants"]:
+            entry["variants"].append((item["style"], item["detail"]))
+
+    # istek anahtarı -> (makale_id, {varyant_id: (stil, detay)} | None, tek sürüm (stil, detay) | None)
+    pending = {}
+    batch_requests = []
+    for paper_id, entry in papers.items():
+        item, variants = entry["item"], entry["variants"]
+        content = _summary_content(item["paper"], item.get("full_text"), item.get("document"))
+        if len(variants) == 1:
+            style, detail = variants[0]
+            request_key = summary_cache.cache_key(paper_id, style, detail, SUMMARY_PROMPT_VERSION)
+            pending[request_key] = (paper_id, None, variants[0])
+            batch_requests.append({"key": request_key,
+                                   "prompt": _build_summary_prompt(item["paper"], content, style, detail)})
+            continue
+        for n, i in enumerate(range(0, len(variants), MAX_VARIANTS_PER_CALL)):
+            prompt, ids = _build_variants_prompt(item["paper"], content, variants[i:i + MAX_VARIANTS_PER_CALL])
+            request_key = f"{paper_id}#{n}"
+            pending[request_key] = (paper_id, ids, None)
+            batch_requests.append({"key": request_key, "prompt": prompt, "generation_config": VARIANTS_CONFIG})
+
+    if batch_requests and get_model():
+        outputs = llm_batch.run_batch(batch_requests, log=log)
+        for request_key, text in outputs.items():
+            if request_key not in pending or not text:
+                continue
+            paper_id, ids, variant = pending[request_key]
+            if ids is None:
+                summary_cache.put(paper_id, variant[0], variant[1], SUMMARY_PROMPT_VERSION, text)
+                results[(paper_id,) + variant] = text
+            else:
+                for variant, summary in _store_variants(paper_id, ids, text).items():
+                    results[(paper_id,) + variant] = summary
+
+    for paper_id, entry in papers.items():
+        missing = [variant for variant in entry["variants"] if (paper_id,) + variant not in results]
+        if not missing:
+            continue
+        item = entry["item"]
+        produced = summarize_paper_variants(item["paper"], missing, full_text=item.get("full_text"),
+                                            document=item.get("document"))
+        for variant, summary in produced.items():
+            results[(paper_id,) + variant] = summary
+    return results
+
+
+def ask_model(prompt, priority="interactive"):
+    """Soru-cevap gibi tek seferlik istekler. Dönen: cevap metni ya da None."""
+    return llm_scheduler.generate(prompt, priority=priority, models=INTERACTIVE_MODELS)
+
+
+async def ask_model_async(prompt, priority="interactive"):
+    """ask_model'in asenkron hali (Telegram handler'ları için)."""
+    return await llm_scheduler.generate_async(prompt, priority=priority, models=INTERACTIVE_MODELS)
+
+
+def suggest_arxiv_categories(keywords, priority="web"):
+    # Kayıt / profil güncelleme sırasında kullanıcı beklediği için varsayılan öncelik "web"
     prompt = f"Bu konular için en uygun ArXiv kategorileri nelerdir? Sadece kodları virgülle ayır: {keywords}"
-    try:
-        return model.generate_content(prompt).text.strip()
-    except:
-        return "eess.SP"
\ No newline at end of file
+    text = llm_scheduler.generate(prompt, priority=priority, models=INTERACTIVE_MODELS)
+    return text.strip() if text else "eess.SP"
\ No newline at end of file
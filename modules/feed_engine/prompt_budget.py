@@ -0,0 +1,257 @@
+# FILE: modules/feed_engine/prompt_budget.py
+# Token bütçeli prompt bağlamı.
+# Metni karakterden kesmek yerine cümlelere ayırır, cümleleri yerelde (TF-IDF + TextRank)
+# puanlar ve token bütçesini en değerli cümlelerle doldurur. Sonuç orijinal sırayı korur.
+#
+# Özet:       bütçe bölümlere paylaştırılır (Abstract/Giriş/Yöntem/Sonuç öncelikli),
+#             sığmayan bölümden en merkezi cümleler seçilir.
+# Soru-cevap: Abstract her zaman girer, kalan bütçe soruya en yakın cümlelerle doldurulur.
+
+import os
+import re
+
+import numpy as np
+
+from modules.feed_engine.sections import (
+    parse_document, section_text, PRIMARY_KINDS, SECONDARY_KINDS, FRONT_MAX_CHARS
+)
+
+# Varsayılanlar eski karakter sınırlarına denk (~4 karakter = 1 token)
+SUMMARY_CONTEXT_TOKENS = int(os.getenv("SUMMARY_CONTEXT_TOKENS", "7500"))
+QA_CONTEXT_TOKENS = int(os.getenv("QA_CONTEXT_TOKENS", "12000"))
+
+CHARS_PER_TOKEN = 4.0
+WORDS_PER_TOKEN = 0.75
+
+# TextRank O(n^2); bundan uzun belgelerde merkez (centroid) benzerliği kullanılır
+MAX_TEXTRANK_SENTENCES = 1500
+
+# Soru-cevapta Abstract'a ayrılan en fazla pay
+QA_ABSTRACT_SHARE = 0.15
+
+SENTENCE_SPLIT = re.compile(r'(?<=[\.\?!])\s+(?=[A-Z0-9\(\[“"])')
+WORD_PATTERN = re.compile(r"[A-Za-zÀ-ÿğüşöçıİĞÜŞÖÇ][A-Za-zÀ-ÿğüşöçıİĞÜŞÖÇ\-]{2,}")
+HEADER_OVERHEAD = 4
+
+STOPWORDS = set("""
+the and for that with this from are was were been being have has had not but its their them they
+which what when where who whom into onto than then also such these those there here our ours
+can could may might will would shall should must each other more most some any all both only very
+using used use based via per over under between within without about above below after before
+while during through however therefore thus hence since because although though
+""".split())
+
+
+def estimate_tokens(text):
+    """Tokenizer olmadan kaba tahmin: karakter ve kelime sayısından büyük olanı."""
+    if not text:
+        return 0
+    return int(max(len(text) / CHARS_PER_TOKEN, len(text.split()) / WORDS_PER_TOKEN)) + 1
+
+
+def split_sentences(text):
+    """PDF metnini cümlelere ayırır (satır sonu tirelemeleri birleştirilir)."""
+    text = re.sub(r'-\s*\n\s*(?=[a-z])', '', text or "")
+    text = " ".join(text.split())
+    if not text:
+        return []
+    return [s.strip() for s in SENTENCE_SPLIT.split(text) if s.strip()]
+
+
+def _words(sentence):
+    return [w for w in (m.lower() for m in WORD_PATTERN.findall(sentence)) if w not in STOPWORDS]
+
+
+def tfidf(sentences, extra=None):
+    """
+    Cümle x terim TF-IDF matrisi (satırlar L2 normlu).
+    extra: aynı sözlük ve IDF ile vektörleştirilecek ek metin (soru).
+    """
+    docs = [_words(s) for s in sentences]
+    vocab = {}
+    for words in docs:
+        for w in set(words):
+            vocab[w] = vocab.get(w, 0) + 1
+    if not vocab:
+        return None, None
+    index = {w: i for i, w in enumerate(vocab)}
+    idf = np.log((1 + len(docs)) / (1 + np.array(list(vocab.values()), dtype=np.float32))) + 1.0
+
+    def vectorize(words):
+        row = np.zeros(len(index), dtype=np.float32)
+        for w in words:
+            i = index.get(w)
+            if i is not None:
+                row[i] += 1.0
+        row *= idf
+        norm = np.linalg.norm(row)
+        return row / norm if norm else row
+
+    matrix = np.vstack([vectorize(words) for words in docs])
+    extra_vector = vectorize(_words(extra)) if extra else None
+    return matrix, extra_vector
+
+
+def _textrank(matrix, damping=0.85, iterations=30):
+    """Benzerlik grafiğinde PageRank; çok uzun belgelerde merkez benzerliği."""
+    n = matrix.shape[0]
+    if n > MAX_TEXTRANK_SENTENCES:
+        centroid = matrix.mean(axis=0)
+        return matrix @ centroid
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, row_sums, out=np.full_like(similarity, 1.0 / n), where=row_sums > 0)
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        scores = (1 - damping) / n + damping * (transition.T @ scores)
+    return scores
+
+
+def _normalize(values):
+    peak = float(values.max()) if len(values) else 0.0
+    return values / peak if peak > 0 else values
+
+
+def rank_sentences(sentences, query=None):
+    """
+    Cümle puanları (0-1). query verilirse merkezilik ile soruya benzerlik harmanlanır.
+    Çok kısa cümleler (tablo / formül artığı) cezalandırılır.
+    """
+    if not sentences:
+        return np.zeros(0, dtype=np.float32)
+    matrix, query_vector = tfidf(sentences, extra=query)
+    if matrix is None:
+        return np.zeros(len(sentences), dtype=np.float32)
+    scores = _normalize(_textrank(matrix))
+    if query_vector is not None and query_vector.any():
+        scores = 0.3 * scores + 0.7 * _normalize(matrix @ query_vector)
+    lengths = np.array([len(s.split()) for s in sentences], dtype=np.float32)
+    return scores * np.clip(lengths / 8.0, 0.2, 1.0)
+
+
+def fair_share(lengths, budget):
+    """Max-min adil paylaşım: kısa bölümler tamamen sığar, kalan bütçe uzunlara bölünür."""
+    shares = [0] * len(lengths)
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    remaining = budget
+    for n, i in enumerate(order):
+        share = min(lengths[i], remaining // (len(order) - n))
+        shares[i] = share
+        remaining -= share
+    return shares
+
+
+def _select(units, token_budget):
+    """
+    units: [(puan, sıra, cümle)] -> bütçeye sığan en yüksek puanlılar (orijinal sırada).
+    """
+    chosen = []
+    used = 0
+    for score, position, sentence in sorted(units, key=lambda u: (-u[0], u[1])):
+        cost = estimate_tokens(sentence)
+        if used + cost > token_budget:
+            continue
+        chosen.append((position, sentence))
+        used += cost
+    chosen.sort()
+    return chosen
+
+
+def _join(chosen):
+    """Seçilen cümleleri birleştirir; aradan cümle atlanan yerlere '…' konur."""
+    parts = []
+    previous = None
+    for position, sentence in chosen:
+        if previous is not None and position != previous + 1:
+            parts.append("…")
+        parts.append(sentence)
+        previous = position
+    return " ".join(parts)
+
+
+def section_units(document):
+    """Bölüm başına cümleler; tüm belge tek seferde puanlanır (ortak IDF)."""
+    sections = document["sections"] or [{"name": "Metin", "kind": "other", "start": 0,
+                                          "end": len(document["text"])}]
+    per_section = []
+    for s in sections:
+        body = section_text(document, s)
+        if s["kind"] == "front":
+            body = body[:FRONT_MAX_CHARS]
+        per_section.append(split_sentences(body))
+    return sections, per_section
+
+
+def build_prompt_context(document, token_budget, query=None):
+    """
+    Bölümlenmiş belgeden token bütçesine sığan bağlam üretir.
+    query yoksa (özet) bütçe bölümlere adil paylaştırılır; varsa (soru-cevap)
+    Abstract'tan sonra tüm belge soruya göre sıralanıp doldurulur.
+    """
+    sections, per_section = section_units(document)
+    flat = [sentence for sentences in per_section for sentence in sentences]
+    if not flat:
+        return ""
+    scores = rank_sentences(flat, query=query)
+
+    # (bölüm, sıra, cümle, puan) - sıra tüm belgede geçerli
+    units = []
+    position = 0
+    for index, sentences in enumerate(per_section):
+        for sentence in sentences:
+            units.append((index, position, sentence, float(scores[position])))
+            position += 1
+
+    chosen = {index: [] for index in range(len(sections))}
+    if query:
+        remaining = token_budget
+        for index, s in enumerate(sections):
+            if s["kind"] == "abstract":
+                picked = _select([(u[3], u[1], u[2]) for u in units if u[0] == index],
+                                 int(token_budget * QA_ABSTRACT_SHARE))
+                chosen[index] = picked
+                remaining -= sum(estimate_tokens(sentence) for _, sentence in picked)
+        taken = {position for picked in chosen.values() for position, _ in picked}
+        for position, sentence in _select([(u[3], u[1], u[2]) for u in units if u[1] not in taken], remaining):
+            chosen[units[position][0]].append((position, sentence))
+    else:
+        remaining = token_budget
+        for group in (PRIMARY_KINDS, SECONDARY_KINDS):
+            members = [i for i, s in enumerate(sections) if s["kind"] in group and per_section[i]]
+            if not members or remaining <= 0:
+                continue
+            needs = [sum(estimate_tokens(x) for x in per_section[i]) + HEADER_OVERHEAD for i in members]
+            for i, share in zip(members, fair_share(needs, remaining)):
+                picked = _select([(u[3], u[1], u[2]) for u in units if u[0] == i], share - HEADER_OVERHEAD)
+                chosen[i] = picked
+                remaining -= sum(estimate_tokens(sentence) for _, sentence in picked) + HEADER_OVERHEAD
+            # Bölümlerin kullanmadığı pay bir sonraki gruba kalır
+
+    blocks = []
+    for index, s in enumerate(sections):
+        picked = sorted(chosen[index])
+        if not picked:
+            continue
+        body = _join(picked)
+        blocks.append(body if s["kind"] == "front" else f"### {s['name']}\n{body}")
+    return "\n\n".join(blocks)
+
+
+def summary_context(document=None, text=None, token_budget=None):
+    """Özet prompt'u için bağlam (document: pdf_engine.download_and_extract_document çıktısı)."""
+    if document is None:
+        if not text:
+            return ""
+        document = parse_document(text)
+    budget = token_budget or SUMMARY_CONTEXT_TOKENS
+    return build_prompt_context(document, budget) or document["text"][:int(budget * CHARS_PER_TOKEN)]
+
+
+def qa_context(text, question, token_budget=None):
+    """Soru-cevap prompt'u için soruya göre seçilmiş bağlam."""
+    if not text:
+        return ""
+    budget = token_budget or QA_CONTEXT_TOKENS
+    return build_prompt_context(parse_document(text), budget, query=question) \
+        or text[:int(budget * CHARS_PER_TOKEN)]
@@ -0,0 +1,162 @@
+# FILE: modules/feed_engine/rate_limiter.py
+# Süreçler arası token-bucket hız sınırlayıcı (SQLite dosyası üzerinden).
+# Flask (app.py), Telegram botu, WhatsApp botu ve interactive_chat aynı Gemini kotasını
+# (5 RPM) paylaştığı için sınır süreç içinde değil, ortak bir dosyada tutulur.
+#
+# Öncelik şeridi:
+#   interactive (Telegram soru-cevap) > web (kayıt / kategori önerisi) > batch (tarama özetleri)
+# - Bekleyen daha yüksek öncelikli bir istek varsa düşük öncelikli istek token alamaz.
+# - batch istekleri kovada her zaman RESERVE kadar token bırakır; böylece gece taraması
+#   sürerken gelen bir soru, bir sonraki dolumu beklemeden hemen cevaplanır.
+
+import os
+import time
+import sqlite3
+import threading
+
+DB_PATH = os.getenv("RATE_LIMIT_DB", "rate_limits.db")
+
+PRIORITIES = {"interactive": 0, "web": 1, "batch": 2}
+
+# rpm: dakikadaki istek, burst: kova kapasitesi, reserve: batch'in dokunamadığı token sayısı
+BUCKET_LIMITS = {
+    "gemini": {"rpm": 5.0, "burst": 2.0, "reserve": 1.0},
+    "gemini_audio": {"rpm": 10.0, "burst": 3.0, "reserve": 0.0},
+}
+
+# Çöken süreçlerin bıraktığı bekleme kayıtları bu süreden sonra yok sayılır
+WAITER_TTL = 120
+
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def _env_override(name, field, default):
+    # Örn: RATE_LIMIT_GEMINI_RPM=10, RATE_LIMIT_GEMINI_BURST=3
+    value = os.getenv(f"RATE_LIMIT_{name.upper()}_{field.upper()}")
+    try:
+        return float(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+def get_limits(name):
+    limits = BUCKET_LIMITS.get(name, {"rpm": 60.0, "burst": 1.0, "reserve": 0.0})
+    return {field: _env_override(name, field, float(value)) for field, value in limits.items()}
+
+
+def _connect():
+    global _initialized
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    if not _initialized:
+        with _init_lock:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL,
+                    updated REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS waiters (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT,
+                    priority INTEGER,
+                    created REAL
+                )
+            """)
+            _initialized = True
+    return conn
+
+
+def _try_take(conn, name, priority, limits):
+    """
+    Tek bir işlem içinde kovayı doldurur ve uygunsa token alır.
+    Dönen: 0 (alındı) veya tekrar denemeden önce beklenecek süre (saniye)
+    """
+    rate = limits["rpm"] / 60.0
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+        if row:
+            tokens = min(limits["burst"], row[0] + max(0.0, now - row[1]) * rate)
+        else:
+            tokens = limits["burst"]
+
+        higher_waiting = conn.execute(
+            "SELECT COUNT(*) FROM waiters WHERE name = ? AND priority < ? AND created > ?",
+            (name, priority, now - WAITER_TTL)
+        ).fetchone()[0]
+
+        needed = 1.0
+        if priority == PRIORITIES["batch"]:
+            needed += limits["reserve"]
+
+        if higher_waiting == 0 and tokens >= needed:
+            tokens -= 1.0
+            wait = 0.0
+        else:
+            wait = max(0.05, (needed - tokens) / rate) if tokens < needed else 0.25
+
+        conn.execute(
+            "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+            (name, tokens, now)
+        )
+        conn.execute("COMMIT")
+        return wait
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def acquire(name, priority="batch", timeout=None):
+    """
+    Kovadan bir token alana kadar bekler.
+    priority: 'interactive' | 'web' | 'batch'
+    timeout: saniye (None = süresiz)
+    Dönen: token alındıysa True, süre dolduysa False
+    """
+    level = PRIORITIES.get(priority, PRIORITIES["batch"])
+    limits = get_limits(name)
+    deadline = time.time() + timeout if timeout is not None else None
+    conn = _connect()
+    waiter_id = None
+    try:
+        # Yüksek öncelikli istekler beklediklerini ilan eder, düşük öncelikliler geri çekilir
+        if level < PRIORITIES["batch"]:
+            waiter_id = conn.execute(
+                "INSERT INTO waiters (name, priority, created) VALUES (?, ?, ?)",
+                (name, level, time.time())
+            ).lastrowid
+
+        while True:
+            wait = _try_take(conn, name, level, limits)
+            if wait == 0:
+                return True
+            if deadline is not None and time.time() + min(wait, 1.0) > deadline:
+                return False
+            # Başka süreçler de token alabileceği için sık aralıklarla tekrar bakılır
+            time.sleep(min(wait, 1.0))
+    finally:
+        if waiter_id is not None:
+            conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+        conn.execute("DELETE FROM waiters WHERE created < ?", (time.time() - WAITER_TTL,))
+        conn.close()
+
+
+def stats(name):
+    limits = get_limits(name)
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+        waiting = conn.execute(
+            "SELECT priority, COUNT(*) FROM waiters WHERE name = ? GROUP BY priority", (name,)
+        ).fetchall()
+    finally:
+        conn.close()
+    tokens = limits["burst"]
+    if row:
+        tokens = min(limits["burst"], row[0] + max(0.0, time.time() - row[1]) * limits["rpm"] / 60.0)
+    return {"tokens": tokens, "limits": limits, "waiting": dict(waiting)}
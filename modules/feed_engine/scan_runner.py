@@ -0,0 +1,302 @@
+# FILE: modules/feed_engine/scan_runner.py
+# Telegram, WhatsApp ve batch (main.py) giriş noktalarının ortak tarama motoru.
+# Akış: eşleştir -> PDF -> özet -> ses -> teslim
+# Eşleştirme bellek içinde hepsi için önceden yapılır; kalan aşamalar pipeline.Stage olarak
+# çalışır ve kanal farkı sadece "teslim" aşamasındadır.
+# Dış servis sınırları throttle modülünde olduğu için toplam süre,
+# kullanıcı başına gecikmelerin toplamı yerine en yavaş ortak kotaya bağlı kalır.
+
+import argparse
+import threading
+
+from database import (
+    get_user_mendeley_token, log_sent_paper,
+    load_sent_paper_index, is_paper_sent_to_user, mark_paper_sent
+)
+from modules.feed_engine.candidate_pool import CandidatePool
+from modules.feed_engine.pipeline import Pipeline, Stage
+from modules.feed_engine import extractive, llm_client
+from modules.feed_engine.pdf_engine import download_and_extract_document
+from modules.feed_engine.processor import (
+    summarize_paper, summarize_paper_variants, summarize_papers_batch, FAILED_SUMMARY
+)
+from modules.feed_engine.audio import submit_speech
+from modules.feed_engine.notifier import send_notification, send_audio
+from modules.feed_engine.mendeley_engine import add_paper_to_library
+from modules.feed_engine.paper_id import canonical_paper_id
+import paper_cache
+
+STAGE_NAMES = ["pdf", "summarize", "tts", "deliver"]
+
+INFO_MESSAGE = "📣 **30 dakika içinde** bu makaleyle ilgili sorularınızı yanıtlayabilirim! Sadece bu mesaja **Yanıtla** diyerek sorunuzu yazın."
+
+
+def add_workers_argument(parser=None):
+    """Giriş noktalarına ortak --workers / --stage-workers seçeneklerini ekler."""
+    parser = parser or argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Her aşamadaki worker sayısı (varsayılan: 1)"
+    )
+    parser.add_argument(
+        "--stage-workers", default="",
+        help="Aşama bazında worker sayısı, örn: pdf=4,summarize=2,tts=2"
+    )
+    parser.add_argument(
+        "--batch-summaries", action="store_true",
+        help="Tüm özetleri tek bir batch işi olarak gönder (gece taraması için)"
+    )
+    return parser
+
+
+def parse_stage_workers(text):
+    """'pdf=4,summarize=2' -> {'pdf': 4, 'summarize': 2}"""
+    result = {}
+    for part in (text or "").split(","):
+        if "=" not in part:
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name in STAGE_NAMES and value.strip().isdigit():
+            result[name] = int(value)
+    return result
+
+
+# ===================== AŞAMALAR =====================
+def make_job(user):
+    """sqlite3.Row kullanıcıyı iş hattında taşınan iş sözlüğüne çevirir."""
+    user = dict(user)
+    return {
+        "user": user,
+        "user_id": user['id'],
+        "name": user['name'],
+        "style": user.get('style') or 'samimi',
+        "detail": user.get('detail_level') or 'orta',
+        "paper": None,
+        "distance": None,
+        "full_text": None,
+        "document": None,
+        "pdf_done": False,
+        "summary": None,
+        "audio": None,
+    }
+
+
+def stage_match(job, pool, sent_index, log):
+    """Kullanıcının en yakın ve daha önce gönderilmemiş makalesini seçer."""
+    user = job['user']
+    log(f"🔍 KULLANICI: {job['name']} (Mod: {job['style']}/{job['detail']})")
+
+    eslesmeler = pool.get_ranked_papers(job['user_id'], user['interests'], user['keywords'])
+    for makale, mesafe in eslesmeler:
+        if is_paper_sent_to_user(job['user_id'], makale['url'], sent_index):
+            continue
+        # Aynı tarama içinde tekrar seçilmesin
+        mark_paper_sent(sent_index, job['user_id'], makale['url'])
+        log(f"   🎯 EŞLEŞME ({job['name']}): {makale['title'][:40]}... (Mesafe: {mesafe:.4f})")
+        job['paper'] = makale
+        job['distance'] = mesafe
+        return job
+
+    log(f"   🏁 Uygun makale yok ({job['name']}).")
+    return None
+
+
+def match_users(users, pool, sent_index, log):
+    """Tüm kullanıcıları eşleştirir; makale bulunanların işlerini döndürür."""
+    jobs = []
+    for user in users:
+        job = stage_match(make_job(user), pool, sent_index, log)
+        if job:
+            jobs.append(job)
+    return jobs
+
+
+def group_by_variant(jobs):
+    """
+    İşleri (makale, stil, detay) üçlüsüne göre gruplar.
+    Her grup için özet bir kez üretilir, gruptaki diğer hocalar önbellekten alır.
+    """
+    groups = {}
+    for job in jobs:
+        key = (canonical_paper_id(job['paper']['url']), job['style'], job['detail'])
+        groups.setdefault(key, []).append(job)
+    return groups
+
+
+def variants_by_paper(groups):
+    """{makale_id: [(stil, detay), ...]} -> bir makale için gereken tüm özet sürümleri."""
+    variants = {}
+    for paper_id, style, detail in groups:
+        variants.setdefault(paper_id, []).append((style, detail))
+    return variants
+
+
+def order_for_summary(groups):
+    """
+    Her makalenin ilk işi öne alınır: farklı makaleler paralel özetlenirken
+    aynı makaleyi bekleyen işler worker'ları bloklamaz, sırası gelince önbellekten okur.
+    """
+    leaders = []
+    followers = []
+    seen = set()
+    for (paper_id, _, _), group in groups.items():
+        if paper_id in seen:
+            followers.extend(group)
+        else:
+            seen.add(paper_id)
+            leaders.append(group[0])
+            followers.extend(group[1:])
+    return leaders + followers
+
+
+def stage_pdf(job, log):
+    log(f"   📄 PDF Analiz Ediliyor ({job['name']})...")
+    job['document'] = download_and_extract_document(job['paper']['url'])
+    job['full_text'] = job['document']['text'] if job['document'] else None
+    job['pdf_done'] = True
+    return job
+
+
+def stage_summarize(job, log, variants=None, paper_locks=None):
+    """
+    variants: {makale_id: [(stil, detay), ...]}
+    Makale birden fazla sürüm gerektiriyorsa hepsi ilk işte tek çağrıyla üretilir;
+    aynı makalenin diğer işleri kilidi bekleyip önbellekten okur.
+    """
+    paper_id = canonical_paper_id(job['paper']['url'])
+    needed = (variants or {}).get(paper_id, [])
+    if len(needed) > 1 and paper_locks is not None:
+        with paper_locks[paper_id]:
+            summarize_paper_variants(job['paper'], needed, full_text=job['full_text'],
+                                     document=job['document'])
+    job['summary'] = summarize_paper(job['paper'], full_text=job['full_text'],
+                                     style=job['style'], detail_level=job['detail'],
+                                     document=job['document'])
+    return job
+
+
+def stage_tts(job, log):
+    if extractive.is_extractive(job['summary']):
+        # Yerel özet İngilizce alıntı içerir; Türkçe ses okuyamaz, sadece metin gider
+        log(f"   🔇 Yerel özet seslendirilmiyor ({job['name']}).")
+        return job
+    if job['user'].get('chat_id'):
+        job['audio'] = submit_speech(job['summary'], style=job['style']).result()
+    return job
+
+
+# ===================== TESLİM =====================
+def add_to_mendeley(job, log):
+    token = get_user_mendeley_token(job['user_id'])
+    if not token:
+        return
+    makale = job['paper']
+    log("   📚 Mendeley'e ekleniyor...")
+    basari = add_paper_to_library(token, makale['title'], makale['url'], makale['abstract'], user_id=job['user_id'])
+    if basari:
+        log("   ✅ Mendeley tamam.")
+    else:
+        log("   ❌ Mendeley hatası.")
+
+
+def deliver_telegram(job, log):
+    """
+    Telegram teslimi: mesaj + ses + 30 dk soru penceresi + Mendeley + arşiv.
+    Dönen: Telegram'a gönderildiyse True
+    """
+    makale = job['paper']
+    chat_id = job['user'].get('chat_id')
+    ozet = job['summary']
+    tam_metin = job['full_text']
+
+    log(f"   📲 Gönderiliyor ({job['name']})...")
+    mesaj = f"👋 Sayın {job['name']},\n\n🚨 **Özel Seçki**\n\n{ozet}\n\n🔗 [Link]({makale['url']})"
+
+    msg_id = None
+    if chat_id:
+        msg_id = send_notification(mesaj, target_chat_id=chat_id)
+        if job['audio']:
+            send_audio(job['audio'], target_chat_id=chat_id)
+
+        # 30 dakikalık soru penceresi
+        paper_cache.add_paper(chat_id, makale['title'], tam_metin if tam_metin else ozet)
+        send_notification(INFO_MESSAGE, target_chat_id=chat_id)
+
+    add_to_mendeley(job, log)
+
+    log_sent_paper(job['user_id'], makale['title'], makale['url'], ozet, full_text=tam_metin, telegram_message_id=msg_id)
+    log("   ✅ Web paneline arşivlendi.")
+    return bool(chat_id)
+
+
+# ===================== MOTOR =====================
+def summarize_jobs_batch(jobs, log):
+    """Batch modu: tüm işlerin özetleri tek batch ile üretilip işlere dağıtılır."""
+    summaries = summarize_papers_batch([
+        {"paper": job['paper'], "full_text": job['full_text'], "document": job['document'],
+         "style": job['style'], "detail": job['detail']}
+        for job in jobs
+    ], log=log)
+    for job in jobs:
+        key = (canonical_paper_id(job['paper']['url']), job['style'], job['detail'])
+        job['summary'] = summaries.get(key) or FAILED_SUMMARY
+    return jobs
+
+
+def run_scan(users, deliver, log=print, workers=1, stage_workers=None, with_audio=True,
+             batch_summaries=False):
+    """
+    Ortak tarama: havuz -> eşleşme matrisi -> iş hattı.
+
+    deliver(job): kanala özel teslim fonksiyonu (Telegram / WhatsApp)
+    workers: tüm aşamalar için varsayılan worker sayısı
+    stage_workers: {'pdf': 4, ...} aşama bazında geçersiz kılma
+    with_audio: False ise ses aşaması atlanır (WhatsApp sesi webhook'ta üretir)
+    batch_summaries: True ise PDF'ler bitince tüm özetler tek batch işiyle üretilir,
+                     ardından ses ve teslim aşamaları çalışır
+    """
+    if not users:
+        return None
+
+    # 1. Tüm kullanıcılar için kaynaklar bir kez taranır ve tek matrisle puanlanır
+    pool = CandidatePool(limit=50)
+    pool.prefetch(users, workers=workers)
+    pool.rank_users(threshold=1.6)
+    sent_index = load_sent_paper_index()
+
+    # 2. Eşleştirme (bellek içi) ve tercih gruplarına ayırma
+    jobs = match_users(users, pool, sent_index, log)
+    if not jobs:
+        return None
+    groups = group_by_variant(jobs)
+    variants = variants_by_paper(groups)
+    paper_locks = {paper_id: threading.Lock() for paper_id in variants}
+    log(f"🧩 {len(jobs)} eşleşme, {len(variants)} makale, {len(groups)} farklı özet.")
+
+    counts = {name: workers for name in STAGE_NAMES}
+    counts.update(stage_workers or {})
+
+    tail_stages = []
+    if with_audio:
+        tail_stages.append(Stage("tts", lambda job: stage_tts(job, log), counts["tts"]))
+    tail_stages.append(Stage("deliver", deliver, counts["deliver"]))
+
+    if batch_summaries:
+        # 3a. PDF'ler -> tek batch özet işi -> ses + teslim
+        Pipeline([Stage("pdf", lambda job: stage_pdf(job, log), counts["pdf"])], log=log).run_sync(jobs)
+        # PDF aşamasında hata veren işler elenir; PDF'i bulunamayanlar (document=None) abstract ile özetlenir
+        ready = summarize_jobs_batch([job for job in jobs if job['pdf_done']], log)
+        result = Pipeline(tail_stages, log=log).run_sync(ready)
+    else:
+        # 3b. Akış halinde: her iş özetini alır almaz ses/teslim aşamasına geçer
+        stages = [
+            Stage("pdf", lambda job: stage_pdf(job, log), counts["pdf"]),
+            Stage("summarize", lambda job: stage_summarize(job, log, variants, paper_locks), counts["summarize"]),
+        ] + tail_stages
+        result = Pipeline(stages, log=log).run_sync(order_for_summary(groups))
+
+    model_report = llm_client.format_metrics()
+    if model_report:
+        log(model_report)
+    return result
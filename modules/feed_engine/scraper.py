@@ -2,6 +2,8 @@ import arxiv
 import requests
 import datetime
 
+from modules.feed_engine.throttle import service_slot
+
 
 def search_arxiv_by_code(category_code, limit=25):
     """
@@ -23,7 +25,9 @@ def search_arxiv_by_code(category_code, limit=25):
 
     results = []
     try:
-        for paper in client.results(search):
+        with service_slot("arxiv"):
+            papers = list(client.results(search))
+        for paper in papers:
             results.append({
                 "title": paper.title,
                 "authors": ", ".join([a.name for a in paper.authors]),
@@ -56,7 +60,8 @@ def search_semantic_scholar_by_keyword(keywords, limit=25):
 
     results = []
     try:
-        response = requests.get(url, params=params)
+        with service_slot("semantic_scholar"):
+            response = requests.get(url, params=params)
         if response.status_code == 200:
             data = response.json()
             if "data" in data:
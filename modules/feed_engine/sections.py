@@ -0,0 +1,138 @@
+# FILE: modules/feed_engine/sections.py
+# PDF metnini bölümlere ayırır (Abstract / Giriş / Yöntem / Sonuç ...).
+# Kaynakça, teşekkür ve ekler atılır. Bütçeli bağlamı prompt_budget bu bölümlerden üretir;
+# Abstract / Giriş / Yöntem / Sonuç öne alınır.
+
+import re
+
+# Bölüm türü -> başlık eşanlamlıları (küçük harf)
+HEADING_ALIASES = {
+    "abstract": ["abstract", "summary of the paper"],
+    "keywords": ["index terms", "keywords", "key words"],
+    "introduction": ["introduction", "background", "motivation", "overview"],
+    "related": ["related work", "related works", "literature review", "prior work", "previous work"],
+    "method": [
+        "method", "methods", "methodology", "approach", "proposed method", "proposed approach",
+        "proposed model", "proposed framework", "proposed system", "system model", "model",
+        "problem formulation", "problem statement", "materials and methods", "framework",
+        "architecture", "preliminaries", "theory", "algorithm"
+    ],
+    "experiments": [
+        "experiments", "experiment", "experimental setup", "experimental results", "evaluation",
+        "simulation", "simulations", "simulation results", "numerical results", "implementation",
+        "case study", "performance evaluation"
+    ],
+    "results": ["results", "results and discussion", "findings", "main results"],
+    "discussion": ["discussion", "analysis", "limitations", "future work"],
+    "conclusion": ["conclusion", "conclusions", "concluding remarks", "conclusion and future work",
+                   "conclusions and future work", "summary"],
+    "references": ["references", "bibliography", "works cited", "literature cited"],
+    "acknowledgements": ["acknowledgements", "acknowledgments", "acknowledgement", "acknowledgment",
+                         "funding"],
+    "appendix": ["appendix", "appendices", "supplementary material", "supplementary materials"],
+}
+
+# Özete hiç girmeyen bölümler
+DROP_KINDS = {"references", "acknowledgements", "appendix"}
+
+# prompt_budget bütçeyi önce bu bölümlere paylaştırır, artan kısım ikinci gruba gider
+PRIMARY_KINDS = ["abstract", "introduction", "method", "experiments", "results", "discussion", "conclusion"]
+SECONDARY_KINDS = ["front", "other", "related", "keywords"]
+
+# "3 Proposed Method", "III. RESULTS", "2.1 Data Set", "Abstract", "Abstract—We propose ..."
+NUMBER_PREFIX = re.compile(r'^(?:(\d{1,2}(?:\.\d{1,2})*)|([IVX]{1,5})|([A-H]))[\.\)]?\s+(?=[A-Za-z])')
+INLINE_ABSTRACT = re.compile(r'^(abstract|index terms)\s*[—–:\-\.]\s*(?=\S)', re.IGNORECASE)
+# Başlık / yazar / kurum kısmından bağlama en fazla bu kadar karakter girer
+FRONT_MAX_CHARS = 1500
+
+
+def _classify(title):
+    """Başlık metnini bölüm türüne çevirir, tanınmazsa None."""
+    clean = re.sub(r'[\s:\.]+$', '', title.strip().lower())
+    clean = " ".join(clean.split())
+    for kind, aliases in HEADING_ALIASES.items():
+        for alias in aliases:
+            if clean == alias or clean.startswith(alias + " "):
+                return kind
+    if clean.startswith("appendix"):
+        return "appendix"
+    return None
+
+
+def _match_heading(line):
+    """
+    Satır bir bölüm başlığıysa (ad, tür, gövdenin satır içi başlangıç ofseti) döner.
+    Numarasız satırlar yalnızca bilinen başlıklarsa kabul edilir.
+    """
+    stripped = line.strip()
+    if not stripped:
+        return None
+
+    # "Abstract—We propose ..." satırı uzun olsa da başlık sayılır
+    inline = INLINE_ABSTRACT.match(stripped)
+    if inline:
+        name = inline.group(1).strip()
+        offset = line.index(stripped) + inline.end()
+        return name.title(), _classify(name), offset
+    if len(stripped) > 80:
+        return None
+
+    number = NUMBER_PREFIX.match(stripped)
+    title = stripped[number.end():] if number else stripped
+    words = title.split()
+    if not words or len(words) > 8 or title.endswith((",", ";")):
+        return None
+    if not re.match(r'^[A-Za-z][A-Za-z0-9 \-&:,/\']*$', title):
+        return None
+
+    kind = _classify(title)
+    if kind:
+        return title.strip(), kind, len(line)
+    # Numaralı ve baş harfleri büyük kısa satırlar da bölüm başlığı sayılır ("4 Graph Encoder")
+    if number and number.group(1) and title[0].isupper() and "." not in number.group(1) \
+            and sum(w[0].isupper() for w in words if w[0].isalpha()) >= max(1, len(words) // 2):
+        return title.strip(), "other", len(line)
+    return None
+
+
+def parse_document(text):
+    """
+    Düz metni bölümlere ayırır.
+    Dönen: {
+        "text": orijinal metin,
+        "sections": [{"name", "kind", "start", "end"}, ...]  (atılanlar hariç, ofsetler text'e göre),
+        "dropped": [{"name", "kind", "start", "end"}, ...]    (kaynakça, teşekkür, ekler),
+    }
+    """
+    text = text or ""
+    headings = []
+    pos = 0
+    for line in text.splitlines(keepends=True):
+        match = _match_heading(line.rstrip("\r\n"))
+        if match:
+            name, kind, body_offset = match
+            headings.append((name, kind, pos, pos + min(body_offset, len(line))))
+        pos += len(line)
+
+    parts = []
+    first_start = headings[0][2] if headings else len(text)
+    if first_start > 0:
+        parts.append({"name": "Front", "kind": "front", "start": 0, "end": first_start})
+
+    after_references = False
+    for i, (name, kind, heading_start, body_start) in enumerate(headings):
+        end = headings[i + 1][2] if i + 1 < len(headings) else len(text)
+        if kind == "references":
+            after_references = True
+        elif after_references and kind not in DROP_KINDS:
+            # Kaynakçadan sonra gelen her şey (harfli ekler vb.) arka kısım sayılır
+            kind = "appendix"
+        parts.append({"name": name, "kind": kind, "start": body_start, "end": end})
+
+    sections = [p for p in parts if p["kind"] not in DROP_KINDS and p["end"] > p["start"]]
+    dropped = [p for p in parts if p["kind"] in DROP_KINDS]
+    return {"text": text, "sections": sections, "dropped": dropped}
+
+
+def section_text(document, section):
+    return document["text"][section["start"]:section["end"]].strip()
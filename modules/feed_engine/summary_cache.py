@@ -0,0 +1,126 @@
+# FILE: modules/feed_engine/summary_cache.py
+# Kalıcı özet önbelleği.
+# Anahtar: (kanonik makale kimliği, stil, detay seviyesi, prompt sürümü)
+# Aynı makale aynı tercihlere sahip iki hocaya eşleşirse Gemini bir kez çağrılır.
+# Aynı anahtar için eşzamanlı istekler tek üretimi bekler (single-flight).
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import weakref
+
+CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "summary_cache.db")
+MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "20000"))
+
+_lock = threading.Lock()
+_initialized = False
+
+# Anahtar başına single-flight kilidi; zayıf referanslı, son bekleyen bırakınca silinir
+_key_locks = weakref.WeakValueDictionary()
+_key_locks_guard = threading.Lock()
+
+
+def _connect():
+    global _initialized
+    conn = sqlite3.connect(CACHE_PATH, timeout=30)
+    if not _initialized:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                paper_id TEXT,
+                style TEXT,
+                detail_level TEXT,
+                prompt_version TEXT,
+                summary TEXT,
+                created_at REAL,
+                last_used REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries(last_used)")
+        conn.commit()
+        _initialized = True
+    return conn
+
+
+def cache_key(paper_id, style, detail_level, prompt_version):
+    raw = "|".join([paper_id or "", style or "", detail_level or "", prompt_version or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get(paper_id, style, detail_level, prompt_version):
+    """Önbellekteki özeti döndürür, yoksa None."""
+    if not paper_id:
+        return None
+    key = cache_key(paper_id, style, detail_level, prompt_version)
+    with _lock:
+        conn = _connect()
+        try:
+            row = conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+        finally:
+            conn.close()
+    return row[0] if row else None
+
+
+def put(paper_id, style, detail_level, prompt_version, summary):
+    if not paper_id or not summary:
+        return
+    key = cache_key(paper_id, style, detail_level, prompt_version)
+    now = time.time()
+    with _lock:
+        conn = _connect()
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO summaries
+                    (key, paper_id, style, detail_level, prompt_version, summary, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (key, paper_id, style, detail_level, prompt_version, summary, now, now))
+            count = conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            if count > MAX_ENTRIES:
+                conn.execute("""
+                    DELETE FROM summaries WHERE key IN (
+                        SELECT key FROM summaries ORDER BY last_used ASC LIMIT ?
+                    )
+                """, (count - MAX_ENTRIES,))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def get_or_create(paper_id, style, detail_level, prompt_version, generate):
+    """
+    Önbellekte varsa döndürür; yoksa generate() ile üretip kaydeder.
+    Aynı anahtar için paralel çağrılardan yalnızca biri generate() çalıştırır.
+    generate() None dönerse (model hatası) kaydedilmez.
+    Dönen: (özet, önbellekten_mi)
+    """
+    cached = get(paper_id, style, detail_level, prompt_version)
+    if cached is not None:
+        return cached, True
+
+    key = cache_key(paper_id, style, detail_level, prompt_version)
+    with _key_locks_guard:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        # Kilidi beklerken başka bir worker üretmiş olabilir
+        cached = get(paper_id, style, detail_level, prompt_version)
+        if cached is not None:
+            return cached, True
+        summary = generate()
+        put(paper_id, style, detail_level, prompt_version, summary)
+        return summary, False
+
+
+def stats():
+    with _lock:
+        conn = _connect()
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        finally:
+            conn.close()
+    return {"entries": count, "max_entries": MAX_ENTRIES, "path": CACHE_PATH}
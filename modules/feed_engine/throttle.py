@@ -0,0 +1,85 @@
+# FILE: modules/feed_engine/throttle.py
+# Dış servisler için süreç içi eşzamanlılık + hız sınırı.
+# Her servis kendi semaforuna ve iki istek arası minimum bekleme süresine sahiptir;
+# böylece paralel tarama, servislerin kotasını aşmadan ilerler.
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+# concurrency: aynı anda en fazla kaç istek
+# min_interval: iki isteğin BAŞLANGICI arasındaki minimum süre (saniye)
+SERVICE_LIMITS = {
+    "arxiv": {"concurrency": 1, "min_interval": 3.0},             # ArXiv API: 3 saniyede 1 istek
+    "semantic_scholar": {"concurrency": 1, "min_interval": 1.0},  # Anahtarsız kullanımda ~1 RPS
+    # "gemini" (metin) burada yok: eşzamanlılık llm_scheduler'da, dakikalık kota rate_limiter'da
+    "gemini_audio": {"concurrency": 3, "min_interval": 0.0},     # Parçalı TTS; dakikalık kota rate_limiter'da
+    "edge_tts": {"concurrency": 3, "min_interval": 0.0},
+    "telegram": {"concurrency": 4, "min_interval": 0.05},         # Global ~30 mesaj/sn
+    "whatsapp": {"concurrency": 4, "min_interval": 0.1},
+    "mendeley": {"concurrency": 2, "min_interval": 0.5},
+    "pdf": {"concurrency": 4, "min_interval": 0.0},
+}
+
+
+class ServiceLimiter:
+    def __init__(self, name, concurrency=1, min_interval=0.0):
+        self.name = name
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self._semaphore = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def _wait_turn(self):
+        # Başlangıç zamanını rezerve et, sonra kilidi bırakıp bekle
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+        delay = start - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    @contextmanager
+    def slot(self):
+        with self._semaphore:
+            self._wait_turn()
+            yield
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_override(name, field, default):
+    # Örn: THROTTLE_GEMINI_CONCURRENCY=1, THROTTLE_ARXIV_MIN_INTERVAL=5
+    value = os.getenv(f"THROTTLE_{name.upper()}_{field.upper()}")
+    if value is None:
+        return default
+    try:
+        return type(default)(value)
+    except ValueError:
+        return default
+
+
+def get_limiter(name):
+    with _limiters_lock:
+        if name not in _limiters:
+            limits = SERVICE_LIMITS.get(name, {"concurrency": 1, "min_interval": 0.0})
+            _limiters[name] = ServiceLimiter(
+                name,
+                concurrency=_env_override(name, "concurrency", limits["concurrency"]),
+                min_interval=_env_override(name, "min_interval", float(limits["min_interval"])),
+            )
+        return _limiters[name]
+
+
+def service_slot(name):
+    """
+    Kullanım:
+        with service_slot("pdf"):
+            response = requests.get(url)
+    """
+    return get_limiter(name).slot()
@@ -1,26 +1,132 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
 import os
+import threading
 
-# Modeli yükle
-print("🧠 Vektör modeli hazırlanıyor...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
+import numpy as np
+import requests
+
+from modules.feed_engine import embedding_cache
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
 
 # HATALI OLAN: DB_PATH = "../../academic_vector_db"
 # DOĞRUSU (Eski hali):
 DB_PATH = "./academic_vector_db"
 
-client = chromadb.PersistentClient(path=DB_PATH)
-collection = client.get_or_create_collection(name="academic_interests")
+# Opsiyonel: Yerel embedding sunucusu (modules/feed_engine/embedding_server.py)
+# Ayarlanırsa Flask, Telegram ve WhatsApp süreçleri modeli tek bir süreçte paylaşır.
+# Örn: EMBEDDING_SERVER_URL=http://127.0.0.1:8765
+EMBEDDING_SERVER_URL = os.getenv("EMBEDDING_SERVER_URL")
+
+# model.encode tek forward pass'te en fazla bu kadar metni işler
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+# Model ve Chroma istemcisi import anında değil, ilk kullanımda yüklenir
+_model = None
+_collection = None
+_model_lock = threading.Lock()
+_collection_lock = threading.Lock()
+
+
+def get_embedding_model():
+    """SentenceTransformer modelini ilk çağrıda yükler (thread-safe)."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                print("🧠 Vektör modeli hazırlanıyor...")
+                _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+
+def get_collection():
+    """Chroma koleksiyonunu ilk çağrıda açar (thread-safe)."""
+    global _collection
+    if _collection is None:
+        with _collection_lock:
+            if _collection is None:
+                import chromadb
+                client = chromadb.PersistentClient(path=DB_PATH)
+                _collection = client.get_or_create_collection(name="academic_interests")
+    return _collection
+
+
+def _batch_size(batch_size):
+    return max(1, int(batch_size or EMBEDDING_BATCH_SIZE))
+
+
+def encode_locally(texts, batch_size=None, normalize=True):
+    """Listeyi batch'ler halinde tek model çağrısıyla encode eder."""
+    vectors = get_embedding_model().encode(
+        texts,
+        batch_size=_batch_size(batch_size),
+        normalize_embeddings=normalize,
+        show_progress_bar=False
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _encode_remote(texts, batch_size=None, normalize=True):
+    response = requests.post(
+        f"{EMBEDDING_SERVER_URL.rstrip('/')}/encode",
+        json={"model": MODEL_NAME, "texts": texts,
+              "batch_size": _batch_size(batch_size), "normalize": normalize},
+        timeout=60
+    )
+    response.raise_for_status()
+    data = response.json()
+    if data.get("model") != MODEL_NAME:
+        raise ValueError(f"Sunucu farklı model kullanıyor: {data.get('model')}")
+    return np.asarray(data["vectors"], dtype=np.float32)
+
+
+def _encode(texts, batch_size=None, normalize=True):
+    """Sunucu ayarlıysa oradan, değilse (veya sunucu yoksa) yerel modelle encode eder."""
+    if EMBEDDING_SERVER_URL:
+        try:
+            return _encode_remote(texts, batch_size, normalize)
+        except Exception as e:
+            print(f"⚠️ Embedding sunucusuna ulaşılamadı, yerel model kullanılıyor: {e}")
+    return encode_locally(texts, batch_size, normalize)
+
+
+def _encode_cached(texts, batch_size=None, normalize=True):
+    """
+    Metinleri önbellek üzerinden encode eder; sadece önbellekte olmayanlar modele gider.
+    Dönen: (len(texts), boyut) float32 matris
+    """
+    # Normalize edilmemiş vektörler ayrı anahtarla saklanır
+    cache_model = MODEL_NAME if normalize else f"{MODEL_NAME}|raw"
+    cached = embedding_cache.get_many(cache_model, texts)
+    missing = [i for i, v in enumerate(cached) if v is None]
+    if missing:
+        # Aynı metin listede birden fazla geçse de bir kez encode edilir
+        new_texts = list(dict.fromkeys(texts[i] for i in missing))
+        new_vectors = _encode(new_texts, batch_size, normalize)
+        embedding_cache.put_many(cache_model, new_texts, new_vectors)
+        by_text = dict(zip(new_texts, new_vectors))
+        for i in missing:
+            cached[i] = by_text[texts[i]]
+    return np.vstack(cached) if cached else np.zeros((0, 0), dtype=np.float32)
+
+
+def vectorize_texts(texts, batch_size=None, normalize=True):
+    """
+    Toplu encode: 100 özet için 100 çağrı yerine batch başına bir forward pass.
+    batch_size: None ise EMBEDDING_BATCH_SIZE
+    normalize: True ise vektörler birim uzunlukta döner
+    Dönen: (len(texts), boyut) float32 numpy matrisi
+    """
+    return _encode_cached([t or "" for t in texts], batch_size, normalize)
 
 
 def vectorize_text(text):
-    return model.encode(text).tolist()
+    return vectorize_texts([text])[0].tolist()
 
 
 def add_user_interest_vector(user_id, keywords):
     vector = vectorize_text(keywords)
-    collection.upsert(
+    get_collection().upsert(
         ids=[str(user_id)],
         embeddings=[vector],
         metadatas=[{"keywords": keywords}],
@@ -29,6 +135,25 @@ def add_user_interest_vector(user_id, keywords):
     print(f"📐 Hoca ID {user_id} vektörlendi.")
 
 
+def add_user_interest_vectors(items, batch_size=None):
+    """
+    Toplu kayıt: [(user_id, keywords), ...] tek encode + tek upsert ile işlenir.
+    Dönen: vektörlenen kullanıcı sayısı
+    """
+    items = [(str(user_id), keywords or "") for user_id, keywords in items]
+    if not items:
+        return 0
+    vectors = vectorize_texts([k for _, k in items], batch_size=batch_size)
+    get_collection().upsert(
+        ids=[user_id for user_id, _ in items],
+        embeddings=vectors.tolist(),
+        metadatas=[{"keywords": k} for _, k in items],
+        documents=[k for _, k in items]
+    )
+    print(f"📐 {len(items)} hoca toplu vektörlendi.")
+    return len(items)
+
+
 def search_relevant_users(paper_abstract, threshold=1.5):
     """
     threshold: Eşik değer.
@@ -39,7 +164,7 @@ def search_relevant_users(paper_abstract, threshold=1.5):
 
     paper_vector = vectorize_text(paper_abstract)
 
-    results = collection.query(
+    results = get_collection().query(
         query_embeddings=[paper_vector],
         n_results=5,
     )
@@ -66,4 +191,82 @@ def search_relevant_users(paper_abstract, threshold=1.5):
         else:
             print(f"      📏 Mesafe: {dist:.4f} > {threshold} -> ❌ UZAK (ID: {user_id})")
 
-    return matched_users
\ No newline at end of file
+    return matched_users
+
+
+def search_relevant_users_bulk(paper_abstracts, threshold=1.5):
+    """
+    search_relevant_users'ın toplu hali: tüm özetler tek seferde puanlanır.
+    Dönen: her özet için eşik altındaki kullanıcı ID'leri (mesafeye göre artan)
+    """
+    user_ids, distances = _distance_matrix(paper_abstracts)
+    if distances is None:
+        return [[] for _ in paper_abstracts]
+
+    results = []
+    for row in distances:
+        order = np.argsort(row)
+        results.append([user_ids[j] for j in order if row[j] < threshold])
+    return results
+
+
+def load_user_vectors():
+    """
+    Koleksiyondaki tüm kullanıcı vektörlerini tek seferde matrise yükler.
+    Dönen: (user_ids, matrix)  -> matrix.shape = (kullanıcı sayısı, boyut)
+    """
+    data = get_collection().get(include=["embeddings"])
+    if not data['ids']:
+        return [], np.zeros((0, 0), dtype=np.float32)
+    user_ids = [int(i) for i in data['ids']]
+    matrix = np.asarray(data['embeddings'], dtype=np.float32)
+    return user_ids, matrix
+
+
+def _distance_matrix(paper_abstracts):
+    """
+    Makaleler x Kullanıcılar kare Öklid mesafe matrisi.
+    Dönen: (user_ids, matrix) ya da kullanıcı/makale yoksa (user_ids, None)
+    """
+    user_ids, user_matrix = load_user_vectors()
+    if not user_ids or not paper_abstracts:
+        return user_ids, None
+
+    texts = [a or "" for a in paper_abstracts]
+    paper_matrix = vectorize_texts(texts)
+
+    # Chroma'nın varsayılan metriği ile aynı: kare Öklid mesafesi
+    # ||p - u||^2 = ||p||^2 + ||u||^2 - 2 p.u
+    distances = (
+        np.sum(paper_matrix ** 2, axis=1)[:, None]
+        + np.sum(user_matrix ** 2, axis=1)[None, :]
+        - 2.0 * paper_matrix @ user_matrix.T
+    )
+    # Özeti olmayan makaleler hiçbir kullanıcıyla eşleşmesin
+    empty = np.array([not t.strip() for t in texts])
+    distances[empty, :] = np.inf
+    return user_ids, distances
+
+
+def rank_papers_for_users(paper_abstracts, threshold=1.5):
+    """
+    Makaleler x Kullanıcılar benzerlik matrisini tek bir matris çarpımıyla hesaplar.
+    Her özet yalnızca bir kez encode edilir ve top-5 sınırı yoktur.
+
+    Dönen: { user_id: [(paper_index, distance), ...] }  (mesafeye göre artan, eşik altı)
+    """
+    user_ids, distances = _distance_matrix(paper_abstracts)
+    if distances is None:
+        return {}
+
+    ranking = {}
+    for col, user_id in enumerate(user_ids):
+        column = distances[:, col]
+        order = np.argsort(column)
+        matches = [(int(i), float(column[i])) for i in order if column[i] < threshold]
+        if matches:
+            ranking[user_id] = matches
+
+    print(f"   🧮 Eşleşme matrisi: {len(paper_abstracts)} makale x {len(user_ids)} kullanıcı "
+          f"({len(ranking)} kullanıcı eşik altında)")
+    return ranking
@@ -2,6 +2,8 @@ import os
 import requests
 from dotenv import load_dotenv
 
+from modules.feed_engine.throttle import service_slot
+
 load_dotenv()
 
 
@@ -40,7 +42,8 @@ def send_whatsapp_message(phone_number, message_text):
     }
     
     try:
-        response = requests.post(url, headers=headers, json=data)
+        with service_slot("whatsapp"):
+            response = requests.post(url, headers=headers, json=data)
         
         if response.status_code == 200:
             result = response.json()
@@ -63,7 +66,7 @@ def send_whatsapp_audio(phone_number, audio_file_path):
     
     Args:
         phone_number: Alıcı telefon numarası
-        audio_file_path: Ses dosyasının yolu (örn: ozet_sesi.wav)
+        audio_file_path: Ses dosyasının yolu (.ogg/opus önerilir, .mp3 de olur)
         
     Returns:
         Message ID veya None
@@ -88,23 +91,25 @@ def send_whatsapp_audio(phone_number, audio_file_path):
     
     try:
         # Dosyayı yükle
-        # MIME type explicit olarak audio/mpeg verilmeli (MP3 için)
+        # MIME type explicit verilmeli: ogg/opus -> audio/ogg (sesli not), MP3 -> audio/mpeg
+        mime_type = 'audio/ogg' if audio_file_path.endswith('.ogg') else 'audio/mpeg'
         with open(audio_file_path, 'rb') as audio_file:
             files = {
-                'file': (os.path.basename(audio_file_path), audio_file, 'audio/mpeg'),
+                'file': (os.path.basename(audio_file_path), audio_file, mime_type),
                 'messaging_product': (None, 'whatsapp'),
-                'type': (None, 'audio/mpeg') # Bazen bu da gerekebilir
+                'type': (None, mime_type) # Bazen bu da gerekebilir
             }
             
             print(f"📤 Ses dosyası yükleniyor ({os.path.getsize(audio_file_path)} bytes): {audio_file_path}")
             
             # 30 saniye timeout ekle
-            upload_response = requests.post(
-                upload_url, 
-                headers=headers, 
-                files=files,
-                timeout=30
-            )
+            with service_slot("whatsapp"):
+                upload_response = requests.post(
+                    upload_url, 
+                    headers=headers, 
+                    files=files,
+                    timeout=30
+                )
             
             if upload_response.status_code != 200:
                 print(f"❌ Dosya yükleme hatası ({upload_response.status_code}): {upload_response.text}")
@@ -130,7 +135,8 @@ def send_whatsapp_audio(phone_number, audio_file_path):
             }
         }
         
-        send_response = requests.post(message_url, headers=headers_json, json=data)
+        with service_slot("whatsapp"):
+            send_response = requests.post(message_url, headers=headers_json, json=data)
         
         if send_response.status_code == 200:
             result = send_response.json()
@@ -200,7 +206,8 @@ def send_whatsapp_template(phone_number, template_name, language_code="tr", para
     }
     
     try:
-        response = requests.post(url, headers=headers, json=data)
+        with service_slot("whatsapp"):
+            response = requests.post(url, headers=headers, json=data)
         
         if response.status_code == 200:
             result = response.json()
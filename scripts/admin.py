@@ -1,6 +1,6 @@
 
 from database import add_user, get_all_users
-from modules.feed_engine.vector_engine import add_user_interest_vector
+from modules.feed_engine.vector_engine import add_user_interest_vector, add_user_interest_vectors
 from modules.feed_engine.processor import suggest_arxiv_categories
 
 def main():
@@ -8,7 +8,8 @@ def main():
         print("\n--- 🎓 ACADEMIC EYE - AKILLI YÖNETİM ---")
         print("1. Yeni Hoca Ekle (Otomatik Kategori Tespiti)")
         print("2. Hocaları Listele")
-        print("3. Çıkış")
+        print("3. Tüm Hocaların Vektörlerini Yenile (Toplu)")
+        print("4. Çıkış")
 
         secim = input("Seçiminiz: ")
 
@@ -46,6 +47,16 @@ def main():
                 print("-" * 40)
 
         elif secim == "3":
+            users = get_all_users()
+            if not users:
+                print("Listede kimse yok.")
+                continue
+            # Tek tek değil, tek encode + tek upsert ile
+            print(f"🧠 {len(users)} hocanın ilgi alanları toplu vektörleniyor...")
+            add_user_interest_vectors([(u['id'], u['keywords']) for u in users])
+            print("✨ Vektörler yenilendi.")
+
+        elif secim == "4":
             break
 
 
@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.feed_engine import llm_client, rate_limiter
+from modules.feed_engine.llm_scheduler import LLMScheduler
+
+BATCH_CALL_SECONDS = 3.0
+
+
+class SlowModel:
+    """Gemini yerine: batch istekleri uzun sürer, interactive istek anında döner."""
+
+    class Response:
+        def __init__(self, text):
+            self.text = text
+
+    def generate_content(self, prompt, generation_config=None):
+        if prompt.startswith("batch"):
+            time.sleep(BATCH_CALL_SECONDS)
+        return self.Response(f"ok: {prompt}")
+
+
+def test_interactive_not_blocked_by_batch():
+    print("🧪 Testing interactive latency while batch summaries are running...")
+
+    originals = llm_client.configure, llm_client.get_model, rate_limiter.acquire
+    llm_client.configure = lambda: True
+    llm_client.get_model = lambda name: SlowModel()
+    rate_limiter.acquire = lambda *args, **kwargs: True  # Kota bu testin konusu değil
+    try:
+        scheduler = LLMScheduler(workers=3)
+        batch = [scheduler.submit(lambda i=i: llm_client.generate(f"batch {i}", models=["fake-model"]),
+                                  priority="batch")
+                 for i in range(4)]
+        time.sleep(0.2)  # Batch işler worker'lara yerleşsin
+
+        started = time.monotonic()
+        answer = scheduler.submit(lambda: llm_client.generate("interactive", models=["fake-model"],
+                                                              priority="interactive"),
+                                  priority="interactive").result(timeout=10)
+        elapsed = time.monotonic() - started
+        print(f"Interactive answer in {elapsed:.2f}s")
+
+        assert answer == "ok: interactive"
+        assert elapsed < 1.0, f"Interactive request waited behind batch work ({elapsed:.2f}s)"
+        for future in batch:
+            future.result(timeout=BATCH_CALL_SECONDS * 3)
+        print("✅ Interactive request was not blocked by batch work")
+    finally:
+        llm_client.configure, llm_client.get_model, rate_limiter.acquire = originals
+
+
+if __name__ == "__main__":
+    test_interactive_not_blocked_by_batch()
@@ -0,0 +1,147 @@
+import sys
+import os
+import glob
+import sqlite3
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+from modules.feed_engine.paper_id import canonical_paper_id
+
+# Legacy history: the same paper sent twice to user 1 through different links
+LEGACY_ROWS = [
+    (1, 'Radar Paper', 'http://arxiv.org/abs/2301.12345v1'),
+    (1, 'Radar Paper', 'https://arxiv.org/pdf/2301.12345v2.pdf'),
+    (1, 'DOI Paper', 'https://doi.org/10.1109/TSP.2023.001'),
+    (2, 'Radar Paper', 'https://arxiv.org/abs/2301.12345'),
+]
+
+
+def _make_legacy_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE user_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER, title TEXT, url TEXT, summary TEXT, full_text TEXT,
+            telegram_message_id INTEGER, date_sent TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany("INSERT INTO user_history (user_id, title, url, summary) VALUES (?, ?, ?, 'ozet')",
+                     LEGACY_ROWS)
+    conn.commit()
+    conn.close()
+
+
+def _history(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT user_id, paper_id FROM user_history ORDER BY id").fetchall()
+    indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    return rows, indexes
+
+
+def _use_db(workdir, name, dedup):
+    database.DB_NAME = os.path.join(workdir, name)
+    database.DEDUP_HISTORY = dedup
+    _make_legacy_db(database.DB_NAME)
+    database.init_db()
+    return database.DB_NAME
+
+
+def test_canonical_paper_id():
+    print("🧪 Testing canonical paper ids...")
+    same = [
+        'http://arxiv.org/abs/2301.12345',
+        'https://arxiv.org/abs/2301.12345v3',
+        'https://arxiv.org/pdf/2301.12345',
+        'https://arxiv.org/pdf/2301.12345v2.pdf',
+        'arxiv.org/abs/2301.12345v1',
+    ]
+    ids = {canonical_paper_id(url) for url in same}
+    print(f"ArXiv variants -> {ids}")
+    assert ids == {'arxiv:2301.12345'}, "ArXiv abs/pdf/versioned links should share one id!"
+    assert canonical_paper_id('https://arxiv.org/abs/hep-th/9901001v2') == 'arxiv:hep-th/9901001'
+
+    doi_ids = {canonical_paper_id(url) for url in [
+        'https://doi.org/10.1109/TSP.2023.001',
+        'http://dx.doi.org/10.1109/tsp.2023.001/',
+        'doi: 10.1109/TSP.2023.001',
+    ]}
+    print(f"DOI variants -> {doi_ids}")
+    assert doi_ids == {'doi:10.1109/tsp.2023.001'}, "DOI links should share one id!"
+    assert canonical_paper_id('') == ''
+    print("✅ Canonical Id Passed")
+
+
+def test_history_migration(workdir):
+    print("\n🧪 Testing user_history migration...")
+
+    print("\n--- Step 1: DEDUP_USER_HISTORY off (rows kept) ---")
+    path = _use_db(workdir, 'keep.db', dedup=False)
+    rows, indexes = _history(path)
+    print(f"Rows: {rows}")
+    assert len(rows) == len(LEGACY_ROWS), "Rows must not be deleted when dedup is off!"
+    assert rows[0][1] == rows[1][1] == 'arxiv:2301.12345', "paper_id backfill failed!"
+    assert rows[2][1] == 'doi:10.1109/tsp.2023.001'
+    assert 'idx_user_history_user_paper' not in indexes, "Unique index cannot exist while duplicates remain!"
+    assert 'idx_user_history_user_paper_nu' in indexes
+    assert not glob.glob(path + '.bak-*'), "No backup expected when nothing is deleted!"
+    print("✅ Keep Mode Passed")
+
+    print("\n--- Step 2: DEDUP_USER_HISTORY on (backup, then dedup) ---")
+    path = _use_db(workdir, 'dedup.db', dedup=True)
+    rows, indexes = _history(path)
+    print(f"Rows: {rows}")
+    assert rows == [(1, 'arxiv:2301.12345'), (1, 'doi:10.1109/tsp.2023.001'), (2, 'arxiv:2301.12345')], \
+        "Only the later duplicate of user 1 should be removed!"
+    assert 'idx_user_history_user_paper' in indexes, "Unique (user_id, paper_id) index missing!"
+    backups = glob.glob(path + '.bak-*')
+    assert len(backups) == 1, "A backup must be taken before deleting rows!"
+    backup_rows, _ = _history(backups[0])
+    assert len(backup_rows) == len(LEGACY_ROWS), "Backup should hold the original rows!"
+    print("✅ Dedup Mode Passed")
+
+    print("\n--- Step 3: Re-running the migration is a no-op ---")
+    database.init_db()
+    assert _history(path)[0] == rows
+    print("✅ Idempotency Passed")
+
+
+def test_sent_lookup(workdir):
+    print("\n🧪 Testing sent-paper lookups...")
+    _use_db(workdir, 'lookup.db', dedup=True)
+
+    print("\n--- Step 1: Without sent_index (DB query) ---")
+    assert database.is_paper_sent_to_user(1, 'https://arxiv.org/pdf/2301.12345v9')
+    assert database.is_paper_sent_to_user(1, 'https://dx.doi.org/10.1109/TSP.2023.001')
+    assert not database.is_paper_sent_to_user(2, 'https://doi.org/10.1109/TSP.2023.001')
+    database.log_sent_paper(2, 'DOI Paper', 'https://doi.org/10.1109/TSP.2023.001', 'ozet')
+    database.log_sent_paper(2, 'DOI Paper', 'doi:10.1109/tsp.2023.001', 'ozet')  # Same paper, ignored
+    assert database.is_paper_sent_to_user(2, 'https://doi.org/10.1109/TSP.2023.001')
+    assert len(database.get_user_history(2)) == 2, "Same paper must be logged only once per user!"
+    print("✅ DB Lookup Passed")
+
+    print("\n--- Step 2: With sent_index (no DB query) ---")
+    sent_index = database.load_sent_paper_index()
+    assert (1, 'arxiv:2301.12345') in sent_index
+    assert database.is_paper_sent_to_user(1, 'http://arxiv.org/abs/2301.12345v2', sent_index)
+    assert not database.is_paper_sent_to_user(3, 'http://arxiv.org/abs/2301.12345', sent_index)
+    database.mark_paper_sent(sent_index, 3, 'https://arxiv.org/pdf/2301.12345.pdf')
+    assert database.is_paper_sent_to_user(3, 'https://arxiv.org/abs/2301.12345v1', sent_index)
+    assert not database.is_paper_sent_to_user(3, 'https://arxiv.org/abs/2301.12345'), \
+        "mark_paper_sent must only touch the in-memory index!"
+    database.mark_paper_sent(None, 3, 'https://arxiv.org/abs/2301.12345')  # No index: silently ignored
+    print("✅ Index Lookup Passed")
+
+
+if __name__ == "__main__":
+    original = database.DB_NAME, database.DEDUP_HISTORY
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            test_canonical_paper_id()
+            test_history_migration(workdir)
+            test_sent_lookup(workdir)
+        finally:
+            database.DB_NAME, database.DEDUP_HISTORY = original
@@ -0,0 +1,39 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.feed_engine.audio import split_for_tts
+
+
+def _check(text, max_chars):
+    chunks = split_for_tts(text, max_chars=max_chars)
+    longest = max(len(c) for c in chunks)
+    assert longest <= max_chars, f"Chunk of {longest} chars exceeds max_chars={max_chars}"
+    assert "".join(chunks).replace(" ", "") == text.replace(" ", ""), "Text was lost or reordered!"
+    return chunks
+
+
+def test_split_for_tts_limits():
+    print("🧪 Testing TTS chunking limits...")
+
+    print("\n--- Step 1: Hard cut (no space or comma) ---")
+    chunks = _check("a" * 250, 100)
+    print(f"Chunk lengths: {[len(c) for c in chunks]}")
+    assert [len(c) for c in chunks] == [100, 100, 50], "Hard cut should slice at exactly max_chars!"
+    print("✅ Hard Cut Passed")
+
+    print("\n--- Step 2: Long sentence cut at commas and spaces ---")
+    chunks = _check("kelime, " * 40 + "son kelime kelime kelime kelime kelime kelime kelime.", 60)
+    print(f"Chunk lengths: {[len(c) for c in chunks]}")
+    print("✅ Delimiter Cut Passed")
+
+    print("\n--- Step 3: Short sentences are packed together ---")
+    chunks = _check("Bu bir cümle. İkinci cümle geldi. Üçüncü de burada.", 40)
+    assert chunks[0] == "Bu bir cümle. İkinci cümle geldi.", f"Unexpected packing: {chunks}"
+    print("✅ Sentence Packing Passed")
+
+
+if __name__ == "__main__":
+    test_split_for_tts_limits()